@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+# Import time of the simulation core as a worker process pays it, measured with
+# python -X importtime in fresh interpreters; exits with status 1 over budget
+# Run from the repository root: python -m benchmarks.bench_import
+
+CORE_MODULES = ['reliability_analysis.parallel', 'reliability_analysis.sweep']
+# Best cumulative import time of CORE_MODULES, numpy included
+BUDGET_MS = 300
+# Packages the core must not import; plotting, tables, scipy and config parsing load where
+# they are used (numba is the kernel engine's optional compiler and stays)
+HEAVY = ('matplotlib', 'pandas', 'scipy', 'tkinter', 'yaml')
+REPEAT = 5
+
+
+def importtime(modules):
+    # Cumulative microseconds per top-level import of a fresh interpreter
+    statement = "; ".join(f"import {module}" for module in modules)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    runs = [importtime(CORE_MODULES) for _ in range(REPEAT)]
+    best = min(runs, key=lambda times: sum(times.get(module, 0) for module in CORE_MODULES))
+    # Modules imported by earlier ones count once, in the cumulative time of the first
+    total = sum(best.get(module, 0) for module in CORE_MODULES) / 1e3
+    for name, cumulative in sorted(best.items(), key=lambda item: -item[1])[:10]:
+        print(f"{name:48s} {cumulative / 1e3:9.1f} ms")
+    heavy = sorted({name.split('.')[0] for name in best} & set(HEAVY))
+    print(f"core import: {total:.1f} ms (budget {BUDGET_MS} ms)")
+    if heavy:
+        print(f"heavy packages imported: {', '.join(heavy)}")
+    return 0 if total <= BUDGET_MS and not heavy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
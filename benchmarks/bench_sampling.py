@@ -0,0 +1,41 @@
+import timeit
+import numpy as np
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.sampling import Sampler
+
+# Compares scalar numpy draws with the pre-drawn pools of reliability_analysis.sampling
+# Run from the repository root: python -m benchmarks.bench_sampling
+
+N = 200000
+
+
+class ScalarSampler:
+    # One numpy call per variate, as Node.update did before the pools
+    def __init__(self, rng):
+        self.rng = rng
+
+    def exponential(self, scale):
+        return lambda: self.rng.exponential(scale)
+
+
+def per_call(stmt, number=N):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e9
+
+
+def main():
+    rng = np.random.default_rng(0)
+    draw = Sampler(rng).exponential(10)
+    scalar = per_call(lambda: rng.exponential(10))
+    pooled = per_call(draw)
+    print(f"draw:  scalar {scalar:7.1f} ns  pooled {pooled:7.1f} ns  saved {scalar - pooled:7.1f} ns")
+    # Per-event cost of a node update on a 50x50 lattice
+    for name, sampler in [("scalar", ScalarSampler(rng)), ("pooled", Sampler(rng))]:
+        lattice = LatticeState(50, 50, 10, 10, sampler=sampler)
+        keys = iter(rng.integers(2500, size=4 * N).tolist())
+        event = iter([True, False] * 2 * N)
+        cost = per_call(lambda: lattice.update(next(keys), next(event), 0.0))
+        print(f"event: {name} {cost:7.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import datetime
+import importlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import numpy as np
+import yaml
+from reliability_analysis import criteria
+from reliability_analysis.event_calendar import EventCalendar
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.parallel import run_batches
+from reliability_analysis.reliability_analysis import simulate
+
+# Timings of check_system, one replication of simulate() and of every extension's simulator, and
+# the batches of config.yaml, with fixed seeds. Results are written as JSON so that runs on two
+# commits can be compared:
+#   python -m benchmarks.bench_suite --output before.json
+#   python -m benchmarks.bench_suite --compare before.json
+# Run from the repository root
+
+SEED = 12345
+LATTICE_SIZES = [3, 10, 50, 100, 200]
+WINDOWS = [(2, 2), (3, 3), (5, 5)]
+# Fraction of failed nodes in the lattices check_system is timed on
+DOWN_FRACTION = 0.3
+# Random nodes the incremental check_system benchmark cycles through for its flips
+EVENT_NODES = 2 ** 16
+# Extension simulators: module, arguments of one replication
+EXTENSIONS = {
+    'diffspan': ('reliability_analysis.extensions.diffSpan.diffspan', (6, 6, 3, 3, 50, 5, 2)),
+    'batch_repairs': ('reliability_analysis.extensions.batch_repairs', (6, 6, 3, 3, 30, 3)),
+    'diff_distribution': ('reliability_analysis.extensions.diff_distribution.diff_distribution', (6, 6, 3, 3, 50, 5, 2)),
+    'lattice_structure': ('reliability_analysis.extensions.lattice_structure.lattice_structure', (10, 10, 30, 10, 2)),
+    'wrapping_selection': ('reliability_analysis.extensions.wrapping_selection.wrapping_selection', (6, 6, 3, 3, 50, 15, 15, False)),
+    'queuing_discipline': ('reliability_analysis.extensions.queuing_discipline.queuing_discipline', (10, 10, 2, 2, 100, 6, 3, True)),
+}
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+
+
+class EventCounter:
+    # Counts the events taken from every EventCalendar while active
+    def __enter__(self):
+        self.events = 0
+        self.get = EventCalendar.get
+        counter = self
+
+        def get(calendar):
+            counter.events += 1
+            return counter.get(calendar)
+
+        EventCalendar.get = get
+        return self
+
+    def __exit__(self, *exc_info):
+        EventCalendar.get = self.get
+
+
+def measure(function, events=None, repeat=3):
+    # Best time per call of function() over repeat rounds of as many calls as fit in about 0.2 s,
+    # and its events per second; events per call are counted on a first call unless given
+    if events is None:
+        with EventCounter() as counter:
+            function()
+        events = counter.events
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {'seconds': seconds, 'events': events, 'events_per_second': events / seconds if seconds else None}
+
+
+def failed_lattice(size, rng):
+    lattice = LatticeState(size, size, rng=rng)
+    lattice.status_flat[:] = rng.random(size * size) >= DOWN_FRACTION
+    return lattice
+
+
+def check_system_benchmarks():
+    # A full check of a lattice (packed rows), and one event on an incremental tracker: a node
+    # flips and the system state is read, as simulate() does after every event
+    for size in LATTICE_SIZES:
+        for r, s in WINDOWS:
+            if r > size:
+                continue
+            rng = np.random.default_rng(SEED)
+            lattice = failed_lattice(size, rng)
+            criterion = criteria.Windows(r, s)
+            yield f'check_system/full/{size}x{size}/r{r}s{s}', lambda: criterion.check_system(lattice), 1
+            tracker = criterion.tracker(size, size).load(lattice)
+            nodes = itertools.cycle(rng.integers(size * size, size=EVENT_NODES).tolist())
+            down = lattice.status_flat.copy()
+
+            def event(tracker=tracker, nodes=nodes, down=down, size=size):
+                k = next(nodes)
+                down[k] = not down[k]
+                tracker.update(k // size, k % size, bool(down[k]))
+                return tracker.check_system()
+
+            yield f'check_system/incremental/{size}x{size}/r{r}s{s}', event, 1
+
+
+def simulate_benchmarks(pattern=''):
+    for m, r in [(3, 2), (10, 2), (30, 3)]:
+        yield (
+            f'simulate/{m}x{m}/r{r}s{r}',
+            lambda m=m, r=r: simulate(m, m, r, r, 50, 10, 10, np.random.default_rng(SEED)),
+            None,
+        )
+    for name, (module_name, args) in EXTENSIONS.items():
+        if pattern not in f'extensions/{name}':
+            continue
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as error:
+            # Extensions importing plotting libraries need the full requirements
+            print(f"skipping extensions/{name}: {error}", file=sys.stderr)
+            continue
+
+        def replication(function=module.simulate, args=args):
+            # Extension simulators draw from the global numpy state
+            np.random.seed(SEED)
+            return function(*args)
+
+        yield f'extensions/{name}', replication, None
+
+
+def config_benchmarks(path=CONFIG_PATH):
+    # Every batch of config.yaml with its runs, in this process
+    with open(path) as f:
+        config = yaml.safe_load(f)
+    for batch_name, batch in config.items():
+        yield f'config/{batch_name}', lambda batch=batch: run_batches({'batch': batch}, SEED), None
+
+
+def run(pattern=''):
+    results = {}
+    for benchmarks in (check_system_benchmarks(), simulate_benchmarks(pattern), config_benchmarks()):
+        for name, function, events in benchmarks:
+            if pattern not in name:
+                continue
+            results[name] = measure(function, events)
+            print(f"{name:48s} {1e3 * results[name]['seconds']:12.4f} ms  "
+                  f"{results[name]['events_per_second'] or 0:14.0f} events/s")
+    return results
+
+
+def environment():
+    # Commit and versions the timings belong to
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': SEED,
+    }
+
+
+def compare(results, baseline):
+    # Time ratios against an earlier result file; above 1 is slower
+    for name, result in results.items():
+        if name in baseline['benchmarks']:
+            ratio = result['seconds'] / baseline['benchmarks'][name]['seconds']
+            flag = '  SLOWER' if ratio > 1.1 else ''
+            print(f"{name:48s} {ratio:8.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time simulate(), check_system and the config batches")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--compare", default=None, metavar="JSON", help="earlier results to compare with")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+    results = run(args.filter)
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'benchmarks': results}, f, indent=1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
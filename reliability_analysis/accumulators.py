@@ -0,0 +1,169 @@
+import bisect
+import math
+import numpy as np
+
+# Per-run metrics in the order simulate() returns them
+METRICS = ('downtime', 'TTF', 'TBF', 'repair_costs', 'maintenance_costs')
+
+
+class P2Quantile:
+    def __init__(self, p):
+        # P-square estimate of the p-quantile (Jain and Chlamtac, 1985): five markers whose
+        # heights follow the minimum, p / 2, p, (1 + p) / 2 quantiles and the maximum
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        n = self.positions
+        # The first five observations are the initial marker heights
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+        # Cell k with q[k] <= x < q[k + 1], extending the outer markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # Move the middle markers one position towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self):
+        # Exact (linearly interpolated) quantile until there are five observations
+        if len(self.heights) < 5:
+            if not self.heights:
+                return math.nan
+            return float(np.quantile(self.heights, self.p))
+        return self.heights[2]
+
+
+class RunningStats:
+    def __init__(self, quantiles=()):
+        # Welford mean and variance, minimum, maximum and P-square quantiles of a stream of numbers
+        self.count = 0
+        self.mean = 0.0
+        self.sum_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.sum_squares += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        for estimator in self.quantiles.values():
+            estimator.add(x)
+
+    def variance(self):
+        return self.sum_squares / (self.count - 1) if self.count > 1 else math.nan
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    def quantile(self, p):
+        return self.quantiles[p].value()
+
+
+class RunStats:
+    def __init__(self, quantiles=()):
+        # Streaming statistics of the runs of a batch: mean vector and co-moment matrix of the
+        # metrics (Welford), their minima and maxima and optional P-square quantiles
+        size = len(METRICS)
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.comoment = np.zeros((size, size))
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        self.quantiles = [{p: P2Quantile(p) for p in quantiles} for _ in METRICS]
+
+    def add(self, run):
+        # One run as the tuple simulate() returns
+        x = np.asarray(run, dtype=float)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        for estimators, value in zip(self.quantiles, run):
+            for estimator in estimators.values():
+                estimator.add(float(value))
+
+    def extend(self, results):
+        # Runs given as five metric lists, like run_task() returns them
+        for run in zip(*results):
+            self.add(run)
+
+    def covariance(self):
+        # Sample covariance matrix of the metrics
+        return self.comoment / (self.count - 1) if self.count > 1 else np.full_like(self.comoment, np.nan)
+
+    def quantile(self, metric, p):
+        return self.quantiles[METRICS.index(metric)][p].value()
+
+    def independent(self):
+        # Statistics of independent observations, which the confidence intervals are taken from
+        return self
+
+    def summary(self):
+        # Count, mean, variance, minimum and maximum of every metric
+        variance = np.diag(self.covariance())
+        return {
+            metric: (self.count, self.mean[k], variance[k], self.min[k], self.max[k])
+            for k, metric in enumerate(METRICS)
+        }
+
+
+class PairedRunStats(RunStats):
+    def __init__(self, quantiles=()):
+        # RunStats of antithetic runs, which come in pairs 2j, 2j + 1; only the pair means are
+        # independent, so their statistics are kept as well
+        super().__init__(quantiles)
+        self.pairs = RunStats()
+        self.first = None
+
+    def add(self, run):
+        super().add(run)
+        if self.first is None:
+            self.first = run
+        else:
+            self.pairs.add([(a + b) / 2 for a, b in zip(self.first, run)])
+            self.first = None
+
+    def independent(self):
+        return self.pairs
+
+
+def make_run_stats(batch):
+    # Streaming statistics for the runs of a batch
+    if batch.get('antithetic'):
+        return PairedRunStats(batch.get('quantiles', ()))
+    return RunStats(batch.get('quantiles', ()))
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+from reliability_analysis.accumulators import METRICS as RUN_METRICS
+
+# Metrics whose confidence intervals decide when an adaptive batch has enough runs
+METRICS = ('breakeven_profit', 'reliability', 'MTTF', 'MTBF')
+DEFAULT_MAX_RUNS = 10000
+
+
+def is_adaptive(batch):
+    # Adaptive batches set target_rel_width, a number for all metrics or a mapping per metric
+    return 'target_rel_width' in batch
+
+
+def targets(batch):
+    target = batch['target_rel_width']
+    if isinstance(target, dict):
+        return {metric: target[metric] for metric in METRICS if metric in target}
+    return {metric: target for metric in METRICS}
+
+
+def t_quantile(confidence, runs):
+    # Student t quantile of a two-sided interval over the square root of the runs; scipy is
+    # imported on first use, as it takes longer to import than the rest of the package
+    from scipy import stats
+
+    return stats.t.ppf((1 + confidence) / 2, runs - 1) / math.sqrt(runs)
+
+
+def intervals(run_stats, end, confidence=0.95):
+    # Estimate and confidence half-width of each metric from the streaming statistics of the runs
+    run_stats = run_stats.independent()
+    runs = run_stats.count
+    if runs < 2:
+        return {metric: (math.nan, math.inf) for metric in METRICS}
+    quantile = t_quantile(confidence, runs)
+    downtime, TTF, TBF, repair_costs, maintenance_costs = run_stats.mean
+    covariance = run_stats.covariance()
+    std = np.sqrt(np.maximum(np.diag(covariance), 0))
+    # Breakeven profit is the ratio of mean costs to mean uptime; its variance follows from the
+    # delta method, the residual costs - breakeven_profit * uptime being linear in the metrics
+    uptime = end * (1 - downtime)
+    breakeven_profit = (repair_costs + maintenance_costs) / uptime
+    weights = np.array([breakeven_profit * end, 0, 0, 1, 1]) / uptime
+    residual_std = math.sqrt(max(weights @ covariance @ weights, 0))
+    return {
+        'breakeven_profit': (breakeven_profit, quantile * residual_std),
+        'reliability': (1 - downtime, quantile * std[0]),
+        'MTTF': (TTF, quantile * std[1]),
+        'MTBF': (TBF, quantile * std[2]),
+    }
+
+
+def mean_intervals(run_stats, confidence=0.95):
+    # Mean and confidence half-width of every per-run metric, e.g. of paired differences of runs
+    run_stats = run_stats.independent()
+    runs = run_stats.count
+    if runs < 2:
+        return {metric: (math.nan, math.inf) for metric in RUN_METRICS}
+    quantile = t_quantile(confidence, runs)
+    std = np.sqrt(np.maximum(np.diag(run_stats.covariance()), 0))
+    return {metric: (run_stats.mean[k], quantile * std[k]) for k, metric in enumerate(RUN_METRICS)}
+
+
+def next_runs(batch, run_stats, min_runs):
+    # Number of runs to add to an adaptive batch, 0 once every interval meets its target or at max_runs
+    runs = run_stats.count
+    max_runs = batch.get('max_runs', DEFAULT_MAX_RUNS)
+    if runs >= max_runs:
+        return 0
+    estimates = intervals(run_stats, batch['end'], batch.get('confidence', 0.95))
+    # How far the widest interval is from its target, relative to the target
+    excess = 0
+    for metric, target in targets(batch).items():
+        estimate, half_width = estimates[metric]
+        if half_width == 0:
+            continue
+        if estimate == 0 or math.isnan(estimate):
+            excess = math.inf
+        else:
+            excess = max(excess, half_width / (target * abs(estimate)))
+    if excess <= 1:
+        return 0
+    # Half-widths shrink with the square root of the runs; grow by at most a factor of two per round
+    needed = math.ceil(runs * excess ** 2) - runs if math.isfinite(excess) else runs
+    return int(min(max(needed, min_runs), max(runs, min_runs), max_runs - runs))
@@ -0,0 +1,108 @@
+import numpy as np
+from reliability_analysis.criteria import Windows
+
+
+def incidence_arrays(m, n, cut_sets):
+    # Dense node -> cut set (window) incidence, padded with a sentinel window that can never fail
+    node_windows = [[] for _ in range(m * n)]
+    for w, cells in enumerate(cut_sets):
+        for k in set(cells):
+            node_windows[k].append(w)
+    sentinel = len(cut_sets)
+    degree = max((len(ws) for ws in node_windows), default=0)
+    incidence = np.full((m * n, max(degree, 1)), sentinel, dtype=np.intp)
+    for k, ws in enumerate(node_windows):
+        incidence[k, :len(ws)] = ws
+    sizes = np.array([len(set(cells)) for cells in cut_sets] + [m * n + 1], dtype=np.int64)
+    return incidence, sizes
+
+
+def simulate_batch(m, n, r, s, end, lam, mu, runs, rng=None, wrap=True, criterion=None):
+    # Advances all replications together; returns the five simulate() metrics as arrays of length runs
+    # The failure criterion defaults to the r x s windows
+    if rng is None:
+        rng = np.random.default_rng()
+    # Cost parameters
+    cr = 0.5
+    cm = 0.25
+    if criterion is None:
+        criterion = Windows(r, s, wrap)
+    incidence, sizes = incidence_arrays(m, n, criterion.cut_sets(m, n))
+    # Per-replication node state (flattened lattice) and window counts
+    up = np.ones((runs, m * n), dtype=bool)
+    next_time = rng.exponential(lam, size=(runs, m * n))
+    counts = np.zeros((runs, len(sizes)), dtype=np.int64)
+    failed_windows = np.zeros(runs, dtype=np.int64)
+    # Per-replication clock and counters
+    t = np.zeros(runs)
+    fail_flag = np.zeros(runs, dtype=bool)
+    TTF = np.full(runs, float(end))
+    TTF_set = np.zeros(runs, dtype=bool)
+    TBF = np.zeros(runs)
+    TBF_sum = np.zeros(runs)
+    TBF_count = np.zeros(runs, dtype=np.int64)
+    total_downtime = np.zeros(runs)
+    repair_costs = np.zeros(runs)
+    maintenance_costs = np.round(cm * next_time, 6).sum(axis=1)
+    # Replication of every row of the state arrays and the rows still being simulated
+    rows = np.arange(runs)
+    running = np.ones(runs, dtype=bool)
+    while running.any():
+        live = np.flatnonzero(running)
+        out = rows[live]
+        # Next event of every running replication
+        k = next_time[live].argmin(axis=1)
+        event_time = next_time[live, k]
+        was_up = up[live, k]
+        # Flip the node and draw its next event (failing nodes get a repair time)
+        up[live, k] = ~was_up
+        next_time[live, k] = event_time + rng.exponential(np.where(was_up, mu, lam))
+        # Update costs depending on node event
+        maintenance_costs[out] += np.where(was_up, 0.0, np.round(cm * next_time[live, k], 6))
+        repair_costs[out] += np.where(was_up, cr, 0.0)
+        # Update window counts and the number of failed windows
+        windows = incidence[k]
+        before = counts[live[:, None], windows]
+        after = before + np.where(was_up, 1, -1)[:, None]
+        counts[live[:, None], windows] = after
+        window_sizes = sizes[windows]
+        failed_windows[live] += (after == window_sizes).sum(axis=1) - (before == window_sizes).sum(axis=1)
+        system_failed = failed_windows[live] > 0
+        # Update counters; the elapsed interval belongs to the state before the event
+        flag = fail_flag[live]
+        elapsed = event_time - t[live]
+        total_downtime[out] += np.where(flag, elapsed, 0.0)
+        tbf = TBF[live] + np.where(flag, 0.0, elapsed)
+        first = system_failed & ~TTF_set[live]
+        TTF[out[first]] = event_time[first]
+        TTF_set[live] |= system_failed
+        new_failure = system_failed & ~flag
+        TBF_sum[out] += np.where(new_failure, tbf, 0.0)
+        TBF_count[out] += new_failure
+        TBF[live] = np.where(new_failure, 0.0, tbf)
+        fail_flag[live] = system_failed
+        # Advance clocks
+        t[live] = np.minimum(event_time, end)
+        running[live] = t[live] < end
+        # Drop finished replications from the state arrays once they make up half of them
+        if 2 * running.sum() <= len(rows):
+            keep = running
+            rows = rows[keep]
+            up = up[keep]
+            next_time = next_time[keep]
+            counts = counts[keep]
+            failed_windows = failed_windows[keep]
+            t = t[keep]
+            fail_flag = fail_flag[keep]
+            TTF_set = TTF_set[keep]
+            TBF = TBF[keep]
+            running = running[keep]
+    # If the system never failed, TBF is set to the simulated time span
+    MTBF = np.where(TBF_count > 0, TBF_sum / np.maximum(TBF_count, 1), float(end))
+    return (
+        total_downtime / end,
+        TTF,
+        MTBF,
+        repair_costs,
+        maintenance_costs,
+    )
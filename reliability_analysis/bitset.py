@@ -0,0 +1,108 @@
+# Failure detection on packed rows: bit j of row i is set when node (i, j) is down
+
+
+def pack_row(row):
+    # Bits of the failed nodes of a row of Node objects, built as a binary string (last node first)
+    return int(''.join(['0' if node.getStatus() else '1' for node in reversed(row)]), 2)
+
+
+def rotate(bits, shift, n):
+    # Rotate an n-bit row right, so that bit j + shift (mod n) lands on bit j
+    shift %= n
+    return ((bits >> shift) | (bits << (n - shift))) & ((1 << n) - 1)
+
+
+def run_starts(bits, n, s, wrap=True):
+    # Bit j is set when nodes j, ..., j + s - 1 of the row are all down; the run length doubles
+    # with every shift-and-AND, so this takes about log2(s) steps
+    covered = 1
+    runs = bits
+    while covered < s:
+        step = min(covered, s - covered)
+        runs &= rotate(runs, step, n) if wrap else runs >> step
+        covered += step
+    return runs
+
+
+def window_starts(row_runs, r, wrap=True):
+    # AND of every r consecutive rows of run starts; entry i covers rows i, ..., i + r - 1,
+    # wrapping around the last row or, without wrapping, only the windows that fit
+    m = len(row_runs)
+    rows = list(row_runs)
+    covered = 1
+    while covered < r:
+        step = min(covered, r - covered)
+        if wrap:
+            rows = [rows[i] & rows[(i + step) % m] for i in range(m)]
+        else:
+            rows = [rows[i] & rows[i + step] for i in range(len(rows) - step)]
+        covered += step
+    return rows
+
+
+def failed(rows, n, r, s, wrap=True):
+    # Whether some r x s window of the packed lattice has all its nodes down
+    row_runs = [run_starts(bits, n, s, wrap) for bits in rows]
+    return any(window_starts(row_runs, r, wrap))
+
+
+def check_system(r, s, lattice, wrap=True):
+    # Same result as check_system on a lattice of Node objects: 0 when failed, 1 otherwise
+    rows = [pack_row(row) for row in lattice]
+    return 0 if failed(rows, len(lattice[0]), r, s, wrap) else 1
+
+
+class BitsetTracker:
+    def __init__(self, m, n, r, s, wrap=True):
+        # Same interface as WindowTracker, for lattices whose windows are too many or too large
+        # to count one by one: keeps every row as an int and its run starts of s failed nodes
+        self.m = m
+        self.n = n
+        self.r = r
+        self.s = s
+        self.wrap = wrap
+        self.rows = [0] * m
+        self.runs = [0] * m
+        self.is_failed = False
+
+    @classmethod
+    def from_lattice(cls, r, s, lattice, wrap=True):
+        return cls(len(lattice), len(lattice[0]), r, s, wrap).load(lattice)
+
+    def load(self, lattice):
+        # Take over the statuses of a lattice of Node objects
+        self.rows = [pack_row(row) for row in lattice]
+        self.runs = [run_starts(bits, self.n, self.s, self.wrap) for bits in self.rows]
+        self.is_failed = any(window_starts(self.runs, self.r, self.wrap))
+        return self
+
+    def update(self, i, j, status):
+        # Record the new status of node (i, j); repeated updates with the same status are ignored
+        bit = 1 << j
+        bits = self.rows[i] & ~bit if status else self.rows[i] | bit
+        if bits == self.rows[i]:
+            return
+        self.rows[i] = bits
+        self.runs[i] = run_starts(bits, self.n, self.s, self.wrap)
+        if status:
+            # A repair can only end a failure
+            if self.is_failed:
+                self.is_failed = any(window_starts(self.runs, self.r, self.wrap))
+        elif not self.is_failed:
+            # A new failure can only complete windows whose rows include row i
+            self.is_failed = any(window_starts(self.nearby_runs(i), self.r, False))
+
+    def nearby_runs(self, i):
+        # Run starts of the rows of the windows containing row i, as a non-wrapping list
+        m = self.m
+        r = self.r
+        if self.wrap:
+            return [self.runs[(i + x) % m] for x in range(-r + 1, r)]
+        return self.runs[max(i - r + 1, 0):min(i + r, m)]
+
+    def failed(self):
+        return self.is_failed
+
+    def check_system(self):
+        # Same convention as check_system: 0 when the system is failed, 1 otherwise
+        return 0 if self.is_failed else 1
@@ -0,0 +1,71 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+
+# One cache for the whole repository, wherever a script is started from
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results.sqlite")
+
+_code_hash = None
+
+
+def source_paths():
+    # Modules of the package and of its extensions, whose simulate overrides run batches too
+    package = os.path.dirname(os.path.abspath(__file__))
+    return sorted(glob.glob(os.path.join(package, "**", "*.py"), recursive=True))
+
+
+def code_hash():
+    # Hash of the simulator sources; editing any module of the package invalidates the cache
+    global _code_hash
+    if _code_hash is None:
+        package = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for path in source_paths():
+            with open(path, 'rb') as f:
+                digest.update(os.path.relpath(path, package).encode())
+                digest.update(f.read())
+        _code_hash = digest.hexdigest()
+    return _code_hash
+
+
+def cache_key(params, seed):
+    # Key of the runs of a batch: its normalized parameters, the root seed and the simulator code
+    return hashlib.sha256(json.dumps([params, str(seed), code_hash()]).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=CACHE_PATH):
+        # SQLite table with one row per run, so later requests can reuse a prefix of the runs
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "key TEXT, run INTEGER, downtime REAL, ttf REAL, tbf REAL, repair_costs REAL, maintenance_costs REAL, "
+            "PRIMARY KEY (key, run))"
+        )
+
+    def load(self, key, start, stop):
+        # Cached runs start, start + 1, ... before stop, up to the first missing one; five metric lists
+        rows = self.connection.execute(
+            "SELECT run, downtime, ttf, tbf, repair_costs, maintenance_costs FROM runs "
+            "WHERE key = ? AND run >= ? AND run < ? ORDER BY run",
+            (key, start, stop),
+        ).fetchall()
+        results = [[] for _ in range(5)]
+        for expected, row in enumerate(rows, start):
+            if row[0] != expected:
+                break
+            for metric, value in zip(results, row[1:]):
+                metric.append(value)
+        return results
+
+    def store(self, key, start, results):
+        # Store runs start, start + 1, ... given as five metric lists
+        rows = [(key, k) + tuple(float(value) for value in run) for k, run in enumerate(zip(*results), start)]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self.connection.close()
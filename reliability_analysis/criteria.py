@@ -0,0 +1,76 @@
+from abc import ABC, abstractmethod
+from reliability_analysis import bitset
+from reliability_analysis.cut_sets import CutSetTracker
+from reliability_analysis.triangle_index import TriangleIndex, find_triangles, triangular_adjacency
+from reliability_analysis.window_tracker import make_tracker, window_cells
+
+# A failure criterion compiles a lattice topology into its minimal cut sets (flat nodes
+# k = i * n + j) and into a tracker with update(i, j, status), failed() and check_system()
+
+
+class Criterion(ABC):
+    @abstractmethod
+    def cut_sets(self, m, n):
+        pass
+
+    def tracker(self, m, n):
+        return CutSetTracker(m, n, self.cut_sets(m, n))
+
+    def check_system(self, lattice):
+        # 0 when a lattice of Node objects is failed, 1 otherwise
+        return self.tracker(len(lattice), len(lattice[0])).load(lattice).check_system()
+
+
+class Windows(Criterion):
+    def __init__(self, r, s, wrap=True):
+        # Consecutive-k-out-of-n: the system fails once all nodes of some r x s window are down,
+        # windows wrapping around the lattice edges when wrap is set
+        self.r = r
+        self.s = s
+        self.wrap = wrap
+
+    def cut_sets(self, m, n):
+        return window_cells(m, n, self.r, self.s, self.wrap)
+
+    def tracker(self, m, n):
+        # Window counts, or packed rows when the lattice has too many window incidences
+        return make_tracker(m, n, self.r, self.s, self.wrap)
+
+    def check_system(self, lattice):
+        # A single check is cheapest on packed rows
+        return bitset.check_system(self.r, self.s, lattice, self.wrap)
+
+
+class Triangles(Criterion):
+    # The system fails once all three nodes of some triangle of the triangular lattice are down
+
+    def cut_sets(self, m, n):
+        return find_triangles(triangular_adjacency(m, n))
+
+    def tracker(self, m, n):
+        return TriangleIndex(m, n)
+
+
+class CutSets(Criterion):
+    def __init__(self, cut_sets):
+        # User-given minimal cut sets, each a list of (i, j) nodes; indices wrap around the lattice
+        self.cells = [[tuple(cell) for cell in cells] for cells in cut_sets]
+
+    def cut_sets(self, m, n):
+        return [sorted({(i % m) * n + j % n for i, j in cells}) for cells in self.cells]
+
+
+CRITERIA = {
+    'windows': Windows,
+    'triangles': Triangles,
+    'cut_sets': CutSets,
+}
+
+
+def from_config(spec):
+    # Criterion from a config mapping such as {'type': 'windows', 'r': 2, 's': 2, 'wrap': False}
+    spec = dict(spec)
+    kind = spec.pop('type')
+    if kind not in CRITERIA:
+        raise ValueError(f"Unknown failure criterion {kind!r}, expected one of {sorted(CRITERIA)}")
+    return CRITERIA[kind](**spec)
@@ -0,0 +1,50 @@
+class CutSetTracker:
+    def __init__(self, m, n, cut_sets):
+        # Keeps the number of failed nodes of every minimal cut set (flat nodes k = i * n + j), so
+        # that one node event only touches the cut sets containing that node; the system is failed
+        # while all nodes of some cut set are down
+        self.m = m
+        self.n = n
+        self.cut_sets = [sorted(set(cells)) for cells in cut_sets]
+        self.sizes = [len(cells) for cells in self.cut_sets]
+        # Incidence lists: for every node the cut sets it belongs to
+        self.incidence = [[] for _ in range(m * n)]
+        for c, cells in enumerate(self.cut_sets):
+            for k in cells:
+                self.incidence[k].append(c)
+        self.counts = [0] * len(self.cut_sets)
+        self.down = [False] * (m * n)
+        self.failed_sets = 0
+
+    def update(self, i, j, status):
+        # Record the new status of node (i, j); repeated updates with the same status are ignored
+        k = i * self.n + j
+        if self.down[k] != status:
+            return
+        self.down[k] = not status
+        counts = self.counts
+        sizes = self.sizes
+        if status:
+            for c in self.incidence[k]:
+                if counts[c] == sizes[c]:
+                    self.failed_sets -= 1
+                counts[c] -= 1
+        else:
+            for c in self.incidence[k]:
+                counts[c] += 1
+                if counts[c] == sizes[c]:
+                    self.failed_sets += 1
+
+    def load(self, lattice):
+        # Take over the statuses of a lattice of Node objects
+        for i in range(self.m):
+            for j in range(self.n):
+                self.update(i, j, lattice[i][j].getStatus())
+        return self
+
+    def failed(self):
+        return self.failed_sets > 0
+
+    def check_system(self):
+        # Same convention as check_system: 0 when the system is failed, 1 otherwise
+        return 0 if self.failed_sets else 1
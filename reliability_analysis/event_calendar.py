@@ -0,0 +1,51 @@
+import heapq
+
+
+class EventCalendar:
+    def __init__(self):
+        # Heap of [time, status, node, alive] entries; a node has at most one pending event,
+        # so scheduling or cancelling only marks its old entry dead instead of removing it
+        self.heap = []
+        self.pending = {}
+
+    def put(self, event):
+        # Same call as PriorityQueue.put((time, status, node)); replaces the node's pending event
+        time, status, node = event
+        self.cancel(node)
+        entry = [time, status, node, True]
+        self.pending[node] = entry
+        heapq.heappush(self.heap, entry)
+        # Drop dead entries once they make up most of the heap
+        if len(self.heap) > 2 * len(self.pending) + 64:
+            self.heap = [entry for entry in self.heap if entry[3]]
+            heapq.heapify(self.heap)
+
+    def get(self):
+        # Earliest pending event as (time, status, node)
+        while self.heap:
+            time, status, node, alive = heapq.heappop(self.heap)
+            if alive:
+                del self.pending[node]
+                return time, status, node
+        raise IndexError("get from an empty event calendar")
+
+    def cancel(self, node):
+        # Forget the pending event of node, if any
+        entry = self.pending.pop(node, None)
+        if entry is not None:
+            entry[3] = False
+
+    def reschedule(self, node, time):
+        # Move the pending event of node to a new time, keeping its status
+        self.put((time, self.pending[node][1], node))
+
+    def scheduled(self, node):
+        # Pending (time, status) of node, or None
+        entry = self.pending.get(node)
+        return None if entry is None else (entry[0], entry[1])
+
+    def empty(self):
+        return not self.pending
+
+    def __len__(self):
+        return len(self.pending)
@@ -1,7 +1,20 @@
-def simulate(m, n, r, s, end, B):
+import os
+import numpy as np
+from reliability_analysis.event_calendar import EventCalendar
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.criteria import Windows
+from reliability_analysis.sweep import run_sweeps
+from reliability_analysis.plotting import pyplot
+
+
+def simulate(m, n, r, s, end, B, streams=None, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = 0
@@ -12,42 +25,48 @@ def simulate(m, n, r, s, end, B):
     repair_costs = 0
     maintenance_costs = 0
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
+    event_queue = EventCalendar()
     standby_list = []
-    # Create latice and fill with nodes, record planned failures
-    lattice = np.empty((m, n), dtype=object)
-    for i in range(m):
-        for j in range(n):
-            lattice[i][j] = Node()
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+    # Create latice state arrays, record planned failures of every node k = i * n + j
+    lattice = LatticeState(m, n, streams=streams)
+    for k, next_event in enumerate(lattice.next_flat.tolist()):
+        event_queue.put((next_event, True, k))
+        maintenance_costs += round(cm * next_event, 6)
+    # Failure state of the r x s windows, updated one node at a time
+    tracker = Windows(r, s).tracker(m, n)
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while (t < end):
         # Get features of next event
-        next_event = event_queue.get()
-        next_time = next_event[0]
-        next_status = next_event[1]
-        next_node = next_event[2]
-        i = int(next_node / m)
-        j = next_node % n
+        next_time, next_status, k = event_queue.get()
+        i, j = divmod(k, n)
+        if profiling:
+            profile.lap('queue')
         # Update node and event queue (making event happen), incur costs
         # False status means it's about to get repaired; execute batch operation
         if next_status == False:
-            standby_list.append([i,j])
+            standby_list.append(k)
             if len(standby_list) == B:
                 repair_costs += cr
-                for x, y in standby_list:
-                    lattice[x][y].update(True, next_time)
-                    event_queue.put((lattice[x][y].getNext(), lattice[x][y].getStatus(), m * x + y))
-                    maintenance_costs += round(cm * lattice[x][y].getNext(), 6)
+                for x in standby_list:
+                    next_event = lattice.update(x, True, next_time)
+                    tracker.update(*divmod(x, n), True)
+                    event_queue.put((next_event, True, x))
+                    maintenance_costs += round(cm * next_event, 6)
                 standby_list.clear()
             # Not repairing if batch not full
         else:
             # True status means it's about to break, update lattice normally
-            lattice[i][j].update(False, next_time)
-            event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
+            next_event = lattice.update(k, False, next_time)
+            tracker.update(i, j, False)
+            event_queue.put((next_event, False, k))
+        if profiling:
+            profile.lap('sampling')
         # Check system status and update counters
-        system_status = check_system(r, s, lattice)
+        system_status = tracker.check_system()
+        if profiling:
+            profile.lap('check')
         if system_status == 0 and TTF == end:
             TTF = next_time
         if system_status == 0:
@@ -66,52 +85,36 @@ def simulate(m, n, r, s, end, B):
                 TBF += (next_time - t)
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * len(TBF_history) - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
     if not TBF_history:
         TBF_history.append(end)
     return total_downtime / end, TTF, np.mean(TBF_history), repair_costs, maintenance_costs
 
 def main():
-    # Number of periods to simulate and metrics
+    # Number of periods to simulate and metrics, 100 simulation runs per batch size; run k of
+    # every batch size sees the same node periods (common random numbers)
     end = 30
-    B_set = range(1,10,1)
-    reliability_set = []
-    MTTF_set = []
-    MTBF_set = []
-    avg_r_set = []
-    avg_m_set = []
-    breakeven_set = []
-    for B in B_set:
-        reliability = []
-        MTTF = []
-        MTBF = []
-        avg_r = []
-        avg_m = []
-        # 10000 simulation runs
-        tic = time.time()
-        for i in range(100):
-            toc = time.time()
-            downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(6, 6, 3, 3, end, B)
-            reliability.append(downtime)
-            MTTF.append(TTF)
-            MTBF.append(TBF)
-            avg_r.append(repair_costs)
-            avg_m.append(maintenance_costs)
-        reliability = 1 - np.mean(reliability)
+    config = {'batch_repairs': {
+        'simulator': 'reliability_analysis.extensions.batch_repairs:simulate',
+        'm': 6, 'n': 6, 'r': 3, 's': 3, 'end': end, 'runs': 100, 'crn': True,
+        'sweep': {'range': {'B': [1, 10, 1]}},
+    }}
+    rows = run_sweeps(config, workers=os.cpu_count())
+    B_set = [row['B'] for row in rows]
+    reliability_set = [row['reliability'] for row in rows]
+    MTTF_set = [row['MTTF'] for row in rows]
+    MTBF_set = [row['MTBF'] for row in rows]
+    avg_r_set = [row['avg_r'] for row in rows]
+    avg_m_set = [row['avg_m'] for row in rows]
+    breakeven_set = [row['breakeven_profit'] for row in rows]
+    for reliability in reliability_set:
         print(reliability)
-        MTTF = np.mean(MTTF)
-        MTBF = np.mean(MTBF)
-        avg_r = round(np.mean(avg_r), 6)
-        avg_m = round(np.mean(avg_m), 6)
-        breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
-        breakeven_set.append(breakeven_profit)
-        reliability_set.append(reliability)
-        MTTF_set.append(MTTF)
-        MTBF_set.append(MTBF)
-        avg_r_set.append(avg_r)
-        avg_m_set.append(avg_m)
-        #print(reliability_set)
-        #print(avg_r)
+    plt = pyplot()
     #Cost plot
     fig, ax = plt.subplots()
     ax.set_xlabel('batch size')
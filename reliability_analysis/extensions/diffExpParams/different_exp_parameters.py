@@ -1,86 +1,14 @@
-import copy
-
 import numpy as np
-from queue import PriorityQueue
 import yaml
-import importlib
-import sys
 import os
-import matplotlib.pyplot as plt
-import matplotlib
-from reliability_analysis import reliability_analysis
-
-matplotlib.use('TkAgg')
-
-def simulate(m, n, r, s, end, lam, mu):
-    # Cost parameters
-    cr = 0.5
-    cm = 0.25
-    # Initiate clock, counters, and a false failure indicator
-    t = 0
-    fail_flag = 0
-    TTF = end
-    TBF = 0
-    TBF_history = []
-    total_downtime = 0
-    repair_costs = 0
-    maintenance_costs = 0
-    # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create latice and fill with nodes, record planned failures
-    lattice = np.empty((m, n), dtype=object)
-    for i in range(m):
-        for j in range(n):
-            lattice[i][j] = reliability_analysis.Node(lam, mu)
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
-    # Simulation
-    while t < end:
-        # Get features of next event
-        next_time, next_status, next_node = event_queue.get()
-        i = next_node // m
-        j = next_node % n
-        # Update node and event queue (making event happen)
-        lattice[i][j].update(not next_status, next_time)
-        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
-        # Update costs depending on node event
-        if lattice[i][j].getStatus():
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
-        else:
-            repair_costs += cr
-        # Check system status and update counters
-        system_status = reliability_analysis.check_system(r, s, lattice)
-        if system_status == 0 and TTF == end:
-            TTF = next_time
-        if system_status == 0:
-            if fail_flag:
-                total_downtime += next_time - t
-            else:
-                TBF += next_time - t
-                TBF_history.append(TBF)
-                fail_flag = 1
-                TBF = 0
-        else:
-            if fail_flag:
-                total_downtime += next_time - t
-                fail_flag = 0
-            else:
-                TBF += next_time - t
-        # Advance clock
-        t = min(next_time, end)
-    # If the system never failed, TBF and TTF are set to the simulated time span
-    if not TBF_history:
-        TBF_history.append(end)
-    return (
-        total_downtime / end,
-        TTF,
-        np.mean(TBF_history),
-        repair_costs,
-        maintenance_costs,
-    )
+from reliability_analysis.sweep import run_sweeps
+from reliability_analysis.plotting import pyplot
 
+# 'simulation' averages runs of simulate(); 'markov' computes the exact expected downtime
+SOLVER = 'simulation'
 
 def plotAvgDowntimeWithDiffMu(downtimeArrMu, muArr):
+    plt = pyplot('TkAgg')
     res = []
     for row in downtimeArrMu:
         res.append(row[0])
@@ -99,6 +27,7 @@ def plotAvgDowntimeWithDiffMu(downtimeArrMu, muArr):
     plt.savefig("different mu")
 
 def plotAvgDowntimeWithDiffLam(downtimeArrLam, lamArr):
+    plt = pyplot('TkAgg')
     # Create a chart
     plt.plot(lamArr, downtimeArrLam, color='red')
 
@@ -114,6 +43,7 @@ def plotAvgDowntimeWithDiffLam(downtimeArrLam, lamArr):
     plt.savefig("different lam")
 
 def plotAvgDowntimeWithDiffParams(downtimeArr, lamArr, muArr):
+    plt = pyplot('TkAgg')
     # Create a 3D chart
     fig = plt.figure()
     ax = plt.axes(projection='3d')
@@ -142,9 +72,6 @@ def main():
     runs = 100
     end = 50
     # Init downtime array with different mu & lam values of the exponential
-    downtimeArr = []
-    muArr = []
-    lamArr = []
     minLam = -1
     minMu = -1
     minDownTime = 10
@@ -155,25 +82,26 @@ def main():
         exponential_lam = yaml.safe_load(f)
     print(exponential_mu)
     print(exponential_lam)
-    lamLen = len(exponential_lam['batch_different_lam'])
-    for _, mu in exponential_mu['batch_different_mu'].items():
-        muArr.append(mu)
-        temp = []
-        for _, lam in exponential_lam['batch_different_lam'].items():
-            if len(lamArr) < lamLen:
-                lamArr.append(lam)
-            # Number of periods to simulate and metrics
-            reliability = []
-            # 10000 simulation runs
-            for i in range(runs):
-                downtime, _, _, _, _ = simulate(3, 3, 2, 2, end, mu, lam)
-                reliability.append(downtime)
-            if minDownTime > np.mean(reliability):
-                minDownTime = np.mean(reliability)
-                minMu = mu
-                minLam = lam
-            temp.append(np.mean(reliability))
-        downtimeArr.append(temp)
+    muArr = list(exponential_mu['batch_different_mu'].values())
+    lamArr = list(exponential_lam['batch_different_lam'].values())
+    if SOLVER == 'markov':
+        from reliability_analysis import markov
+
+        downtimes = [markov.solve(3, 3, 2, 2, end, mu, lam)['downtime'] for mu in muArr for lam in lamArr]
+    else:
+        # 100 simulation runs for every pair, spread over all cores; simulate takes mu as its
+        # first rate and lam as its second. Only downtime is used, so the runs skip the costs
+        config = {'different_exp_parameters': {
+            'm': 3, 'n': 3, 'r': 2, 's': 2, 'end': end, 'runs': runs, 'metrics': ['downtime'],
+            'sweep': {'grid': {'lam': muArr, 'mu': lamArr}},
+        }}
+        downtimes = [1 - row['reliability'] for row in run_sweeps(config, workers=os.cpu_count())]
+    for k, downtime in enumerate(downtimes):
+        if minDownTime > downtime:
+            minDownTime = downtime
+            minMu = muArr[k // len(lamArr)]
+            minLam = lamArr[k % len(lamArr)]
+    downtimeArr = [downtimes[k:k + len(lamArr)] for k in range(0, len(downtimes), len(lamArr))]
     print("min Mu:", minMu)
     print("min Lam:", minLam)
 
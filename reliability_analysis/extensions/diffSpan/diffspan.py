@@ -1,12 +1,11 @@
 import numpy as np
-from queue import PriorityQueue
-import math
-import yaml
-import importlib
-import sys
+from reliability_analysis.event_calendar import EventCalendar
 import os
-import matplotlib.pyplot as plt
 import csv
+from reliability_analysis.criteria import Windows
+from reliability_analysis.sweep import run_sweeps
+from reliability_analysis.plotting import pyplot
+
 class Node:
     def __init__(self, lam= 10, mu=10):
         # Uptime rate (lam) and downtime rate (mu); they give average periods until event
@@ -32,38 +31,18 @@ class Node:
 
 
 def check_system(r, s, lattice):
-    m = len(lattice)
-    n = len(lattice[0])
-    # Building transformed matrix
-    transformed_matrix = []
-    flag = 0
-    for i in range(m):
-        transformed_row = []
-        for j in range(n + s - 1):
-            # Scan the lattice for dangerous rows, hopping over columns' end
-            if not lattice[i % m][j % n].getStatus():
-                flag += 1
-                if flag == s:
-                    transformed_row.append((j - s + 1) % n)
-                    flag -= 1
-            else:
-                flag = 0
-        transformed_matrix.append(transformed_row)
-    # Scan transformed matrix to see if it's broken, hopping over rows' end
-    for row in range(m + r - 1):
-        #Build intersection of the r rows
-        init_set = set(transformed_matrix[row % m])
-        for more in range(r):
-            init_set = init_set & set(transformed_matrix[(row + more) % m])
-        if (init_set):
-                return 0
-    return 1
+    # 0 when some r x s window (wrapping around rows and columns) has all nodes down, else 1
+    return Windows(r, s).check_system(lattice)
 
 
-def simulate(m, n, r, s, end, lam, mu):
+def simulate(m, n, r, s, end, lam, mu, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = 0
@@ -74,30 +53,42 @@ def simulate(m, n, r, s, end, lam, mu):
     repair_costs = 0
     maintenance_costs = 0
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create latice and fill with nodes, record planned failures
+    event_queue = EventCalendar()
+    # Create latice and fill with nodes, record planned failures of every node i * n + j
     lattice = np.empty((m, n), dtype=object)
     for i in range(m):
         for j in range(n):
             lattice[i][j] = Node()
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
+            event_queue.put((lattice[i][j].getNext(), True, i * n + j))
             maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+    # Failure state of the r x s windows, updated one node at a time
+    tracker = Windows(r, s).tracker(m, n)
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while t < end:
         # Get features of next event
         next_time, next_status, next_node = event_queue.get()
-        i = next_node // m
-        j = next_node % n
+        i, j = divmod(next_node, n)
+        if profiling:
+            profile.lap('queue')
         # Update node and event queue (making event happen)
         lattice[i][j].update(not next_status, next_time)
-        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
+        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), i * n + j))
+        if profiling:
+            profile.lap('sampling')
         # Update costs depending on node event
         if lattice[i][j].getStatus():
             maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
         else:
             repair_costs += cr
+        if profiling:
+            profile.lap('accounting')
         # Check system status and update counters
-        system_status = check_system(r, s, lattice)
+        tracker.update(i, j, lattice[i][j].getStatus())
+        system_status = tracker.check_system()
+        if profiling:
+            profile.lap('check')
         if system_status == 0 and TTF == end:
             TTF = next_time
         if system_status == 0:
@@ -116,6 +107,11 @@ def simulate(m, n, r, s, end, lam, mu):
                 TBF += next_time - t
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * len(TBF_history) - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
     if not TBF_history:
         TBF_history.append(end)
@@ -130,46 +126,27 @@ def simulate(m, n, r, s, end, lam, mu):
 
 def main():
     END = [30, 60, 90, 120, 150, 180, 210, 240, 270, 300]
-    total_breakeven_profit = []
-    total_reliability = []
-    total_MTTF = []
-    total_MTBF = []
-    total_avg_r = []
-    total_avg_m = []
-    for i in range(len(END)):
-        end = END[i]
-        reliability = []
-        MTTF = []
-        MTBF = []
-        avg_r = []
-        avg_m = []
-        print("END = %d" %end)
-        # 10000 simulation runs
-        for j in range(100):
-            downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(6, 6, 3, 3, end, 5, 2)
-            reliability.append(downtime)
-            MTTF.append(TTF)
-            MTBF.append(TBF)
-            avg_r.append(repair_costs)
-            avg_m.append(maintenance_costs)
-        reliability = 1 - np.mean(reliability)
-        MTTF = np.mean(MTTF)
-        MTBF = np.mean(MTBF)
-        avg_r = round(np.mean(avg_r), 6)
-        avg_m = round(np.mean(avg_m), 6)
-        breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
-        total_breakeven_profit.append(breakeven_profit)
-        total_reliability.append(reliability)
-        total_MTTF.append(MTTF)
-        total_MTBF.append(MTBF)
-        total_avg_r.append(avg_r)
-        total_avg_m.append(avg_m)
-        print(breakeven_profit)
-        print(reliability)
-        print(MTTF)
-        print(MTBF)
-        print(avg_r)
-        print(avg_m)
+    # 100 simulation runs per time span, spread over all cores
+    config = {'diffspan': {
+        'simulator': 'reliability_analysis.extensions.diffSpan.diffspan:simulate',
+        'm': 6, 'n': 6, 'r': 3, 's': 3, 'lam': 5, 'mu': 2, 'runs': 100,
+        'sweep': {'grid': {'end': END}},
+    }}
+    rows = run_sweeps(config, workers=os.cpu_count())
+    total_breakeven_profit = [row['breakeven_profit'] for row in rows]
+    total_reliability = [row['reliability'] for row in rows]
+    total_MTTF = [row['MTTF'] for row in rows]
+    total_MTBF = [row['MTBF'] for row in rows]
+    total_avg_r = [row['avg_r'] for row in rows]
+    total_avg_m = [row['avg_m'] for row in rows]
+    for row in rows:
+        print("END = %d" %row['end'])
+        print(row['breakeven_profit'])
+        print(row['reliability'])
+        print(row['MTTF'])
+        print(row['MTBF'])
+        print(row['avg_r'])
+        print(row['avg_m'])
 
 
     with open('reliability_analysis/extensions/diffSpan/output.csv', mode='w', newline='') as file:
@@ -179,6 +156,7 @@ def main():
             writer.writerow([END[i],total_breakeven_profit[i],total_reliability[i],total_MTTF[i],total_MTBF[i],total_avg_r[i],total_avg_m[i]])
 
             
+    plt = pyplot()
     plot1 = plt.plot(END, total_breakeven_profit)
     plt.xlabel('System Time Span'); plt.ylabel('breakeven_profit')
     plt.show()
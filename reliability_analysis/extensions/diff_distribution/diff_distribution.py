@@ -1,17 +1,25 @@
 import numpy as np
-from queue import PriorityQueue
-import math
+from reliability_analysis.event_calendar import EventCalendar
 import yaml
-import importlib
-import sys
-import os
+from reliability_analysis.criteria import Windows
+from reliability_analysis.sampling import Sampler
+from reliability_analysis.plugins import REGISTRY
 
 
 class Node:
-    def __init__(self, dist='exponential', lam=10, mu=10, mu2=10, sigma=1, k=1):
+    def __init__(self, dist='exponential', lam=10, mu=10, mu2=10, sigma=1, k=1, sampler=None, up=None, repair=None):
         # Uptime rate (lam) and downtime rate (mu); they give average periods until event
+        # Periods come from the pre-drawn pools of the sampler; the distribution is picked once here.
+        # up and repair give the distributions of the up and the repair periods as specs of
+        # sampling.DISTRIBUTIONS; without them both follow dist
+        if sampler is None:
+            sampler = Sampler()
+        if up is None:
+            up = self.generate_next_event(dist, lam, mu, mu2, sigma, k)
+        self.__draw_up = sampler.periods(up)
+        self.__draw_down = self.__draw_up if repair is None else sampler.periods(repair)
         self.__status = True
-        self.__next_event = self.generate_next_event(dist, lam, mu, mu2, sigma, k)
+        self.__next_event = self.__draw_up()
         self.__dist = dist
         self.__lam = lam
         self.__mu = mu
@@ -20,12 +28,13 @@ class Node:
         self.__k = k
 
     def generate_next_event(self, dist, lam, mu, mu2, sigma, k):
+        # Distribution spec of the named distribution; normal periods are truncated at 0
         if dist == 'exponential':
-            return np.random.exponential(lam)
+            return {'dist': 'exponential', 'mean': lam}
         elif dist == 'normal':
-            return np.random.normal(mu, sigma)
+            return {'dist': 'truncated_normal', 'mean': mu, 'sigma': sigma}
         elif dist == 'weibull':
-            return np.random.weibull(k) * mu2
+            return {'dist': 'weibull', 'shape': k, 'scale': mu2}
         else:
             raise ValueError(f"Unknown distribution: {dist}")
 
@@ -33,10 +42,10 @@ class Node:
         # Boolean event decides if uptime or downtime computed; setter for status and next event
         if event:
             self.__status = True
-            self.__next_event = current_time + self.generate_next_event(self.__dist, self.__lam, self.__mu, self.__mu2, self.__sigma, self.__k)
+            self.__next_event = current_time + self.__draw_up()
         else:
             self.__status = False
-            self.__next_event = current_time + self.generate_next_event(self.__dist, self.__lam, self.__mu, self.__mu2, self.__sigma, self.__k)
+            self.__next_event = current_time + self.__draw_down()
 
     def getStatus(self):
         return self.__status
@@ -46,34 +55,19 @@ class Node:
 
 
 def check_system(r, s, lattice):
-    m = len(lattice)
-    n = len(lattice[0])
-    # Building transformed matrix
-    transformed_matrix = []
-    flag = 0
-    for i in range(m):
-        transformed_row = []
-        for j in range(n + s - 1):
-            # Scan the lattice for dangerous rows, hopping over columns' end
-            if not lattice[i % m][j % n].getStatus():
-                flag += 1
-                if flag == s:
-                    transformed_row.append((j - s + 1) % n)
-                    flag -= 1
-            else:
-                flag = 0
-        transformed_matrix.append(transformed_row)
-    # Scan transformed matrix to see if it's broken, hopping over rows' end
-    for row in range(m + r - 1):
-        if set(transformed_matrix[row % m]) & set(transformed_matrix[(row + 1) % m]):
-            return 0
-    return 1
+    # 0 when some 2 x s window (wrapping around rows and columns) has all nodes down, else 1;
+    # only pairs of consecutive rows are intersected, whatever r is
+    return Windows(2, s).check_system(lattice)
 
 
-def simulate(m, n, r, s, end, lam, mu, dist='exponential', mu2=10, sigma=1, k=1):
+def simulate(m, n, r, s, end, lam, mu, dist='exponential', mu2=10, sigma=1, k=1, up=None, repair=None, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = 0
@@ -84,30 +78,43 @@ def simulate(m, n, r, s, end, lam, mu, dist='exponential', mu2=10, sigma=1, k=1)
     repair_costs = 0
     maintenance_costs = 0
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create lattice and fill with nodes, record planned failures
+    event_queue = EventCalendar()
+    # Create lattice and fill with nodes sharing one sampler, record planned failures
+    sampler = Sampler()
     lattice = np.empty((m, n), dtype=object)
     for i in range(m):
         for j in range(n):
-            lattice[i][j] = Node(dist=dist, lam=lam, mu=mu, mu2=mu2, sigma=sigma, k=k)
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
+            lattice[i][j] = Node(dist=dist, lam=lam, mu=mu, mu2=mu2, sigma=sigma, k=k, sampler=sampler, up=up, repair=repair)
+            event_queue.put((lattice[i][j].getNext(), True, i * n + j))
             maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+    # Failure state of the windows; like check_system, only pairs of rows are intersected
+    tracker = Windows(2, s).tracker(m, n)
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while t < end:
         # Get features of next event
         next_time, next_status, next_node = event_queue.get()
-        i = next_node // m
-        j = next_node % n
+        i, j = divmod(next_node, n)
+        if profiling:
+            profile.lap('queue')
         # Update node and event queue (making event happen)
         lattice[i][j].update(not next_status, next_time)
-        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
+        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), i * n + j))
+        if profiling:
+            profile.lap('sampling')
         # Update costs depending on node event
         if lattice[i][j].getStatus():
             maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
         else:
             repair_costs += cr
+        if profiling:
+            profile.lap('accounting')
         # Check system status and update counters
-        system_status = check_system(r, s, lattice)
+        tracker.update(i, j, lattice[i][j].getStatus())
+        system_status = tracker.check_system()
+        if profiling:
+            profile.lap('check')
         if system_status == 0 and TTF == end:
             TTF = next_time
         if system_status == 0:
@@ -126,6 +133,11 @@ def simulate(m, n, r, s, end, lam, mu, dist='exponential', mu2=10, sigma=1, k=1)
                 TBF += next_time - t
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * len(TBF_history) - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
     if not TBF_history:
         TBF_history.append(end)
@@ -145,13 +157,8 @@ def main():
     print(config)
     for i, (batch_name, batch) in enumerate(config.items()):
         print(f"Simulating Batch {i + 1} of {len(config)} - {batch_name}")
-        for module_name in batch['extension_modules']:
-            spec = importlib.util.spec_from_file_location(module_name,
-                                                          os.path.join("../../../reliability_analysis", "extensions",
-                                                                       module_name, module_name + ".py"))
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+        # Extensions are imported once and kept across batches
+        REGISTRY.overrides(batch['extension_modules'])
         # Number of periods to simulate and metrics
         end = batch['end']
         reliability = []
@@ -161,7 +168,9 @@ def main():
         avg_m = []
         # 10000 simulation runs
         for i in range(batch['runs']):
-            downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(3, 3, 2, 2, end, batch['lam'], batch['mu'])
+            downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(
+                3, 3, 2, 2, end, batch['lam'], batch['mu'], up=batch.get('up'), repair=batch.get('repair'),
+            )
             reliability.append(downtime)
             MTTF.append(TTF)
             MTBF.append(TBF)
@@ -179,8 +188,6 @@ def main():
         print(MTBF)
         print(avg_r)
         print(avg_m)
-        for module in batch['extension_modules']:
-            del sys.modules[module]
 
 
 if __name__ == "__main__":
@@ -1,20 +1,14 @@
-import copy
 import csv
 import numpy as np
-from queue import PriorityQueue
 import yaml
-import importlib
-import sys
-import os
-import matplotlib.pyplot as plt
-import matplotlib
 from reliability_analysis import reliability_analysis
-matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
+from reliability_analysis.plotting import pyplot
+from reliability_analysis.store import ResultStore
+from reliability_analysis.plugins import REGISTRY
 
 
 def plot_xy(x, y, xlabel, ylabel, title, filename=None):
+    plt = pyplot('TkAgg')
     plt.clf()
     plt.plot(x, y)
     plt.xlabel(xlabel)
@@ -31,16 +25,13 @@ def main():
     print(config)
 
     results = []
+    # Every run is kept in a columnar store next to the results table
+    store = ResultStore('different_mn_runs')
 
     for i, (batch_name, batch) in enumerate(config.items()):
         print(f"Simulating Batch {i + 1} of {len(config)} - {batch_name}")
-        for module_name in batch['extension_modules']:
-            spec = importlib.util.spec_from_file_location(module_name,
-                                                          os.path.join("../../../reliability_analysis", "extensions",
-                                                                       module_name, module_name + ".py"))
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+        # Extensions are imported once and kept across batches
+        REGISTRY.overrides(batch['extension_modules'])
         # Number of periods to simulate and metrics
         end = 50
         reliability = []
@@ -56,6 +47,8 @@ def main():
             MTBF.append(TBF)
             avg_r.append(repair_costs)
             avg_m.append(maintenance_costs)
+        batch_id = store.add_batch(batch_name, {'m': 6, 'n': 6, 'r': batch['m'], 's': batch['n'], 'end': end, 'lam': 15, 'mu': 15}, None)
+        store.append(batch_id, 0, [reliability, MTTF, MTBF, avg_r, avg_m])
         reliability = 1 - np.mean(reliability)
         MTTF = np.mean(MTTF)
         MTBF = np.mean(MTBF)
@@ -63,15 +56,14 @@ def main():
         avg_m = round(np.mean(avg_m), 6)
         breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
       
-        for module in batch['extension_modules']:
-            del sys.modules[module]
         results.append([f"m={batch['m']}",f"n={batch['n']}", breakeven_profit, reliability, MTTF, MTBF, avg_r, avg_m])
+    store.close()
 
     # Write results to a csv file
-        with open('results.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["value of m", "value of n", "breakeven profit", "reliability", "MTTF", "MTBF", "avg_r", "avg_m"])
-            writer.writerows(results)
+    with open('results.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["value of m", "value of n", "breakeven profit", "reliability", "MTTF", "MTBF", "avg_r", "avg_m"])
+        writer.writerows(results)
 
 if __name__ == "__main__":
     main()
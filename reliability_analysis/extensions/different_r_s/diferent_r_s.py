@@ -1,20 +1,12 @@
-import copy
-
 import numpy as np
-from queue import PriorityQueue
 import yaml
-import importlib
-import sys
-import os
-import matplotlib.pyplot as plt
-import matplotlib
 from reliability_analysis import reliability_analysis
-matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
+from reliability_analysis.plotting import pyplot
+from reliability_analysis.plugins import REGISTRY
 
 
 def plot_xy(x, y, xlabel, ylabel, title, filename=None):
+    plt = pyplot('TkAgg')
     plt.clf()
     plt.plot(x, y)
     plt.xlabel(xlabel)
@@ -40,13 +32,8 @@ def main():
 
     for i, (batch_name, batch) in enumerate(config.items()):
         print(f"Simulating Batch {i + 1} of {len(config)} - {batch_name}")
-        for module_name in batch['extension_modules']:
-            spec = importlib.util.spec_from_file_location(module_name,
-                                                          os.path.join("../../../reliability_analysis", "extensions",
-                                                                       module_name, module_name + ".py"))
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+        # Extensions are imported once and kept across batches
+        REGISTRY.overrides(batch['extension_modules'])
         # Number of periods to simulate and metrics
         end = 50
         reliability = []
@@ -76,8 +63,6 @@ def main():
         mtbf.append(MTBF)
         avgr.append(avg_r)
         avgm.append(avg_m)
-        for module in batch['extension_modules']:
-            del sys.modules[module]
 
     plot_xy(r, bp, 'r', 'breakeven_profit', 'Change of breakeven_profit when r change', 'r_bp')
     plot_xy(r, re, 'r', 'reliability', 'Change of reliability when r change', 'r_re')
@@ -1,9 +1,13 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
+from reliability_analysis.store import ResultStore
 
 
-df = pd.read_csv("qd_data.csv")
+# Only the columns the plots need are read from the runs queuing_discipline.py stored
+store = ResultStore("qd_runs")
+runs = pd.DataFrame(store.read(["smart", "r", "m", "TTF", "TBF"]))
+df = runs.groupby(["smart", "r", "m"], as_index=False).mean()
+df = df.rename(columns={"smart": "SMART", "r": "R", "m": "M", "TTF": "MTTF", "TBF": "MTBF"})
 # df = df.loc[df.M > 10]
 
 for label, group in df.groupby("R"):
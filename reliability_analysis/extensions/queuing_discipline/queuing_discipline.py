@@ -1,32 +1,41 @@
 import numpy as np
-from queue import PriorityQueue
-import math
+from reliability_analysis.event_calendar import EventCalendar
 import yaml
-import importlib
-import sys
 import os
-import pandas as pd
+import csv
+from reliability_analysis.sampling import Sampler
+from reliability_analysis.criteria import Windows
+from reliability_analysis.cut_sets import CutSetTracker
+from reliability_analysis.store import ResultStore
+from reliability_analysis.sweep import run_sweeps
 
 SMART_REPAIR = False
 
 
 class Node:
-    def __init__(self, lam=10, mu=10):
+    def __init__(self, lam=10, mu=10, sampler=None, draws=None):
         # Uptime rate (lam) and downtime rate (mu); they give average periods until event
+        # Periods come from the pre-drawn pools of the sampler, or from the node's own
+        # (draw_up, draw_down) functions when given
+        if draws is None:
+            if sampler is None:
+                sampler = Sampler()
+            draws = (sampler.exponential(lam), sampler.exponential(mu))
+        self.__draw_up, self.__draw_down = draws
         self.__status = True
-        self.__next_event = np.random.exponential(lam)
+        self.__next_event = self.__draw_up()
         self.__lam = lam
         self.__mu = mu
 
     def enable(self, current_time):
         self.__status = True
-        self.__next_event = current_time + np.random.exponential(self.__lam)
+        self.__next_event = current_time + self.__draw_up()
 
     def disable(self):
         self.__status = False
 
     def repair(self, current_time):
-        self.__next_event = current_time + np.random.exponential(self.__mu)
+        self.__next_event = current_time + self.__draw_down()
 
     def get_online(self):
         return self.__status
@@ -35,51 +44,36 @@ class Node:
         return self.__next_event
 
 
-def get_system_status(r, s, lattice, smart=SMART_REPAIR):
-    m = len(lattice)
-    n = len(lattice[0])
-    # Building transformed matrix
-    transformed_matrix = np.zeros((m - r + 1, n - s + 1))
-    for i in range(len(transformed_matrix)):
-        for j in range(len(transformed_matrix[0])):
-            # Scan the lattice for dangerous rows, hopping over columns' end
-            for x in range(r):
-                for y in range(s):
-                    if not lattice[(i + x) % m][(j + y) % n].get_online():
-                        transformed_matrix[i][j] += 1
-    # Scan transformed matrix to see if it's broken, hopping over rows' end
+def get_system_status(r, s, tracker, smart=SMART_REPAIR):
+    # Whether all nodes of some r x s window are offline, and the next node to repair: with smart
+    # repair the offline node with the most offline nodes in the windows starting up to r - 1 rows
+    # and s - 1 columns before it (start indices wrap around), otherwise the first offline node
+    # row by row; (-1, -1) when every node is online
+    n = tracker.n
+    rows = tracker.m - r + 1
+    cols = n - s + 1
+    counts = tracker.counts
     if smart:
-        prio_matrix = np.zeros((m, n))
-        for i in range(m):
-            for j in range(n):
-                if not lattice[i][j].get_online():
-                    for x in range(r):
-                        for y in range(s):
-                            prio_matrix[i][j] += transformed_matrix[(i - x) % (m - r + 1)][(j - y) % (n - s + 1)]
-        idx = np.argmax(prio_matrix)
-        next_repair = (idx // m, idx % n)
-        if lattice[next_repair[0]][next_repair[1]].get_online():
-            next_repair = (-1, -1)
+        priority = [0] * len(tracker.down)
+        for k, down in enumerate(tracker.down):
+            if down:
+                i, j = divmod(k, n)
+                priority[k] = sum(counts[((i - x) % rows) * cols + (j - y) % cols] for x in range(r) for y in range(s))
+        k = int(np.argmax(priority))
+        next_repair = divmod(k, n) if tracker.down[k] else (-1, -1)
     else:
-        found = False
-        for i in range(m):
-            for j in range(n):
-                if not lattice[i][j].get_online():
-                    next_repair = (i, j)
-                    found = True
-                if found:
-                    break
-            if found:
-                break
-        if not found:
-            next_repair = (-1, -1)
-    return np.any(transformed_matrix == (r * s)), next_repair
-
-
-def simulate(m, n, r, s, end, lam, mu, smart=SMART_REPAIR):
+        next_repair = next((divmod(k, n) for k, down in enumerate(tracker.down) if down), (-1, -1))
+    return tracker.failed(), next_repair
+
+
+def simulate(m, n, r, s, end, lam, mu, smart=SMART_REPAIR, streams=None, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = False
@@ -92,18 +86,29 @@ def simulate(m, n, r, s, end, lam, mu, smart=SMART_REPAIR):
     maintenance_costs = 0
     repairing = False
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create latice and fill with nodes, record planned failures
+    event_queue = EventCalendar()
+    # Create latice and fill with nodes sharing one sampler (or drawing from their own streams
+    # with common random numbers), record planned failures
+    sampler = Sampler()
     lattice = np.empty((m, n), dtype=object)
     for i in range(m):
         for j in range(n):
-            lattice[i][j] = Node()
+            if streams is None:
+                lattice[i][j] = Node(sampler=sampler)
+            else:
+                lattice[i][j] = Node(draws=streams.draws(i, j, 10, 10))
             event_queue.put((lattice[i][j].get_time(), True, (i, j)))
             maintenance_costs += round(cm * lattice[i][j].get_time(), 6)
+    # Offline-node counts of the r x s windows inside the lattice, in row-major order of their starts
+    tracker = CutSetTracker(m, n, Windows(r, s, wrap=False).cut_sets(m, n))
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while t < end:
         # Get features of next event
         next_time, next_status, (i, j) = event_queue.get()
+        if profiling:
+            profile.lap('queue')
         # Update node and event queue (making event happen)
         if next_status:
             lattice[i][j].disable()
@@ -111,13 +116,20 @@ def simulate(m, n, r, s, end, lam, mu, smart=SMART_REPAIR):
             lattice[i][j].enable(next_time)
             event_queue.put((lattice[i][j].get_time(), True, (i, j)))
             repairing = False
+        if profiling:
+            profile.lap('sampling')
         # Update costs depending on node event
         if lattice[i][j].get_online():
             maintenance_costs += round(cm * lattice[i][j].get_time(), 6)
         else:
             repair_costs += cr
+        if profiling:
+            profile.lap('accounting')
         # Check system status and update counters
-        system_status, (x, y) = get_system_status(r, s, lattice, smart)
+        tracker.update(i, j, lattice[i][j].get_online())
+        system_status, (x, y) = get_system_status(r, s, tracker, smart)
+        if profiling:
+            profile.lap('check')
         if not repairing and x != -1:
             lattice[x][y].repair(next_time)
             event_queue.put((lattice[x][y].get_time(), False, (x, y)))
@@ -145,6 +157,11 @@ def simulate(m, n, r, s, end, lam, mu, smart=SMART_REPAIR):
                 TTF_history.append(TTF)
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * len(TBF_history) - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
 
     if not TBF_history:
@@ -164,40 +181,31 @@ def main():
     # Load Simulation Settings
     with open("qd.yaml", 'r') as f:
         config = yaml.safe_load(f)
-    end = config['end']
-    df = pd.DataFrame(columns=["SMART", "R", "M", "BE_PROFIT", "RELIABILITY", "MTTF", "MTBF", "AVG_R", "AVG_M"])
-    for smart in [True, False]:
-        for r in [2, 3, 4]:
-            for m in [5, 10, 15, 30, 50]:
-                reliability = []
-                MTTF = []
-                MTBF = []
-                avg_r = []
-                avg_m = []
-                # m = 10
-                # r = 2
-                # 10000 simulation runs
-                for i in range(config['runs']):
-                    downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(m, m, r, r, end, config['lam'], config['mu'], smart=smart)
-                    reliability.append(downtime)
-                    MTTF.append(TTF)
-                    MTBF.append(TBF)
-                    avg_r.append(repair_costs)
-                    avg_m.append(maintenance_costs)
-                reliability = 1 - np.mean(reliability)
-                MTTF = np.mean(MTTF)
-                MTBF = np.mean(MTBF)
-                avg_r = round(np.mean(avg_r), 6)
-                avg_m = round(np.mean(avg_m), 6)
-                breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
-                # print(breakeven_profit)
-                # print(reliability)
-                # print(MTTF)
-                # print(MTBF)
-                # print(avg_r)
-                # print(avg_m)
-                df.loc[len(df.index)] = [smart, r, m, breakeven_profit, reliability, MTTF, MTBF, avg_r, avg_m]
-    df.to_csv("qd_data.csv", index=False)
+    # Both queuing disciplines for every square lattice and window, spread over all cores. Run k
+    # of both disciplines sees the same node periods (common random numbers), so their paired
+    # differences need far fewer runs than independent runs would
+    batches = {}
+    for r in [2, 3, 4]:
+        for m in [5, 10, 15, 30, 50]:
+            batches[f"r{r}_m{m}"] = dict(
+                config,
+                simulator='reliability_analysis.extensions.queuing_discipline.queuing_discipline:simulate',
+                m=m, n=m, r=r, s=r, crn=True,
+                sweep={'grid': {'smart': [True, False]}},
+            )
+    # Every run goes to the columnar store that qd_graphs.py reads
+    with ResultStore("qd_runs") as store:
+        rows = run_sweeps(batches, workers=os.cpu_count(), store=store)
+    for row in rows:
+        if not row['smart']:
+            print(f"R={row['r']} M={row['m']}: naive - smart MTTF {row['diff_TTF']:.4f} +- {row['diff_TTF_hw']:.4f}")
+    with open("qd_data.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["SMART", "R", "M", "BE_PROFIT", "RELIABILITY", "MTTF", "MTBF", "AVG_R", "AVG_M"])
+        writer.writerows(
+            [row['smart'], row['r'], row['m'], row['breakeven_profit'], row['reliability'], row['MTTF'],
+             row['MTBF'], row['avg_r'], row['avg_m']] for row in rows
+        )
 
 
 if __name__ == "__main__":
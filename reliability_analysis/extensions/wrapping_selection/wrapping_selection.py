@@ -1,12 +1,11 @@
 import numpy as np
-from queue import PriorityQueue
-import math
+from reliability_analysis.event_calendar import EventCalendar
 import yaml
-import importlib
-import sys
 import os
-import matplotlib.pyplot as plt
-from reliability_analysis import *
+from reliability_analysis.criteria import Windows
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.sweep import run_sweeps
+from reliability_analysis.plotting import pyplot
 
 
 def plot_3d(x, y, z, xlabel, ylabel, zlabel, title, label, ax):
@@ -19,67 +18,18 @@ def plot_3d(x, y, z, xlabel, ylabel, zlabel, title, label, ax):
 
 
 def check_system(r, s, lattice, wrap=False):
-    m = len(lattice)
-    n = len(lattice[0])
+    # Windows wrap around the lattice edges only when wrap is set
+    return Windows(r, s, wrap).check_system(lattice)
 
-    if wrap == True:
-        # Building transformed matrix
-        transformed_matrix = []
-        flag = 0
-        for i in range(m):
-            transformed_row = []
-            for j in range(n + s - 1):
-                # Scan the lattice for dangerous rows, hopping over columns' end
-                if not lattice[i % m][j % n].getStatus():
-                    flag += 1
-                    if flag == s:
-                        transformed_row.append((j - s + 1) % n)
-                        flag -= 1
-                else:
-                    flag = 0
-            transformed_matrix.append(transformed_row)
-        # Scan transformed matrix to see if it's broken, hopping over rows' end
-        for row in range(m + r - 1):
-            # Build intersection of the r rows
-            init_set = set(transformed_matrix[row % m])
-            for more in range(r):
-                init_set = init_set & set(transformed_matrix[(row + more) % m])
-            if (init_set):
-                return 0
-        return 1
-    
-    else:
-        # Building transformed matrix
-        transformed_matrix = []
-        flag = 0
-        for i in range(m):
-            transformed_row = []
-            for j in range(n - s + 1):
-                # Scan the lattice for dangerous rows
-                if not lattice[i][j].getStatus():
-                    flag += 1
-                    if flag == s:
-                        transformed_row.append(j - s + 1)
-                        flag -= 1
-                else:
-                    flag = 0
-            transformed_matrix.append(transformed_row)
 
-        # Scan transformed matrix to see if it's broken
-        for row in range(m - r + 1):
-            # Build intersection of the r rows
-            init_set = set(transformed_matrix[row])
-            for more in range(1, r):
-                init_set = init_set & set(transformed_matrix[row + more])
-            if init_set:
-                return 0
-        return 1
-
-
-def simulate(m, n, r, s, end, lam, mu, wrap):
+def simulate(m, n, r, s, end, lam, mu, wrap, streams=None, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = 0
@@ -90,30 +40,41 @@ def simulate(m, n, r, s, end, lam, mu, wrap):
     repair_costs = 0
     maintenance_costs = 0
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create latice and fill with nodes, record planned failures
-    lattice = np.empty((m, n), dtype=object)
-    for i in range(m):
-        for j in range(n):
-            lattice[i][j] = Node()
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+    event_queue = EventCalendar()
+    # Create latice state arrays, record planned failures of every node k = i * n + j
+    lattice = LatticeState(m, n, lam, mu, streams=streams)
+    for k, next_event in enumerate(lattice.next_flat.tolist()):
+        event_queue.put((next_event, True, k))
+        maintenance_costs += round(cm * next_event, 6)
+    # Failure state of the r x s windows, updated one node at a time
+    tracker = Windows(r, s, wrap).tracker(m, n)
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while t < end:
         # Get features of next event
-        next_time, next_status, next_node = event_queue.get()
-        i = next_node // m
-        j = next_node % n
+        next_time, next_status, k = event_queue.get()
+        i, j = divmod(k, n)
+        if profiling:
+            profile.lap('queue')
         # Update node and event queue (making event happen)
-        lattice[i][j].update(not next_status, next_time)
-        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
+        status = not next_status
+        next_event = lattice.update(k, status, next_time)
+        event_queue.put((next_event, status, k))
+        if profiling:
+            profile.lap('sampling')
         # Update costs depending on node event
-        if lattice[i][j].getStatus():
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+        if status:
+            maintenance_costs += round(cm * next_event, 6)
         else:
             repair_costs += cr
+        if profiling:
+            profile.lap('accounting')
         # Check system status and update counters
-        system_status = check_system(r, s, lattice, wrap)
+        tracker.update(i, j, status)
+        system_status = tracker.check_system()
+        if profiling:
+            profile.lap('check')
         if system_status == 0 and TTF == end:
             TTF = next_time
         if system_status == 0:
@@ -132,6 +93,11 @@ def simulate(m, n, r, s, end, lam, mu, wrap):
                 TBF += next_time - t
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * len(TBF_history) - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
     if not TBF_history:
         TBF_history.append(end)
@@ -173,49 +139,37 @@ def main():
         "n": []
     }
 
-    for i, (batch_name, batch) in enumerate(config.items()):
-        print(f"Simulating Batch {i + 1} of {len(config)} - {batch_name}")
-        m = batch["m"]
-        n = batch["n"]
-        r = batch["r"]
-        s = batch["s"]
-
-        # Store r, s, m, and n values
-        data["r"].append(r)
-        data["s"].append(s)
-        data["m"].append(m)
-        data["n"].append(n)
-
-        for wrap in [True, False]:
-            end = 50
-            runs = 100
-            lam = 15
-            mu = 15
-
-            # Prepare lists for storing the results
-            reliability = []
-            MTTF = []
-            MTBF = []
-            avg_r = []
-            avg_m = []
-
-            # Run the simulations
-            for _ in range(runs):
-                downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(m, n, r, s, end, lam, mu, wrap)
-                reliability.append(downtime)
-                MTTF.append(TTF)
-                MTBF.append(TBF)
-                avg_r.append(repair_costs)
-                avg_m.append(maintenance_costs)
-
-            # Calculate averages
-            prefix = "wrapped" if wrap else "non_wrapped"
-            data[prefix]["breakeven_profit"].append((np.mean(avg_r) + np.mean(avg_m)) / (np.mean(reliability) * end))
-            data[prefix]["reliability"].append(np.mean(reliability))
-            data[prefix]["MTTF"].append(np.mean(MTTF))
-            data[prefix]["MTBF"].append(np.mean(MTBF))
-            data[prefix]["avg_r"].append(np.mean(avg_r))
-            data[prefix]["avg_m"].append(np.mean(avg_m))
+    # Store r, s, m, and n values
+    for batch in config.values():
+        data["r"].append(batch["r"])
+        data["s"].append(batch["s"])
+        data["m"].append(batch["m"])
+        data["n"].append(batch["n"])
+
+    # 100 simulation runs of every batch with and without wrapping, spread over all cores; both
+    # see the same node periods run by run (common random numbers)
+    end = 50
+    for batch in config.values():
+        batch.update({
+            'simulator': 'reliability_analysis.extensions.wrapping_selection.wrapping_selection:simulate',
+            'end': end,
+            'runs': 100,
+            'lam': 15,
+            'mu': 15,
+            'crn': True,
+            'sweep': {'grid': {'wrap': [True, False]}},
+        })
+    print(f"Simulating {len(config)} batches")
+    for row in run_sweeps(config, workers=os.cpu_count()):
+        # Average downtime is stored as reliability
+        downtime = 1 - row['reliability']
+        prefix = "wrapped" if row['wrap'] else "non_wrapped"
+        data[prefix]["breakeven_profit"].append((row['avg_r'] + row['avg_m']) / (downtime * end))
+        data[prefix]["reliability"].append(downtime)
+        data[prefix]["MTTF"].append(row['MTTF'])
+        data[prefix]["MTBF"].append(row['MTBF'])
+        data[prefix]["avg_r"].append(row['avg_r'])
+        data[prefix]["avg_m"].append(row['avg_m'])
 
     # Plot the results
     labels = ["breakeven_profit",
@@ -226,6 +180,7 @@ def main():
               "avg_m"
               ]
 
+    plt = pyplot()
     fig = plt.figure(figsize=(12, 8))
 
     for i, label in enumerate(labels):
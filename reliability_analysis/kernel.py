@@ -0,0 +1,159 @@
+import numpy as np
+from reliability_analysis import criteria
+from reliability_analysis.batch_engine import incidence_arrays
+from reliability_analysis.reliability_analysis import simulate as simulate_events
+from reliability_analysis.sampling import Sampler
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Slots of the float and int state arrays the kernel resumes from
+T, TTF, TBF, TBF_MEAN, DOWNTIME, REPAIR_COSTS, MAINTENANCE_COSTS = range(7)
+FAIL_FLAG, TBF_COUNT, FAILED_SETS = range(3)
+
+
+def before(a, b, next_time, up):
+    # Calendar order of the pending events of nodes a and b: time, then status, then node
+    if next_time[a] != next_time[b]:
+        return next_time[a] < next_time[b]
+    if up[a] != up[b]:
+        return up[b]
+    return a < b
+
+
+def sift_down(heap, next_time, up):
+    # Restore the heap after the event time of its root node changed
+    size = len(heap)
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            return
+        if child + 1 < size and before(heap[child + 1], heap[child], next_time, up):
+            child += 1
+        if not before(heap[child], heap[i], next_time, up):
+            return
+        heap[i], heap[child] = heap[child], heap[i]
+        i = child
+
+
+def run_events(end, heap, next_time, up, incidence, sizes, counts, values_up, values_down, shared, positions, fstate, istate):
+    # Event loop of simulate() on typed arrays. Every node has exactly one pending event, so the
+    # heap holds one entry per node and an event only moves its root. Periods come from the
+    # pre-drawn buffers values_up (mean lam) and values_down (mean mu), read from positions[0]
+    # and positions[1], or both from values_up when shared; returns 0 or 1 when that buffer must
+    # be refilled before the next event, and -1 once the run has passed end. All loop state
+    # lives in fstate and istate
+    cr = 0.5
+    cm = 0.25
+    while fstate[T] < end:
+        k = heap[0]
+        # A failing node draws a repair period, a repaired node an up period
+        pool = 1 if up[k] and not shared else 0
+        values = values_down if pool else values_up
+        if positions[pool] == len(values):
+            return pool
+        period = values[positions[pool]]
+        positions[pool] += 1
+        # Flip the node and reschedule it (making event happen)
+        event_time = next_time[k]
+        status = not up[k]
+        up[k] = status
+        next_time[k] = event_time + period
+        sift_down(heap, next_time, up)
+        # Update costs and cut-set counts depending on node event
+        if status:
+            fstate[MAINTENANCE_COSTS] += round(cm * next_time[k], 6)
+            for c in incidence[k]:
+                if counts[c] == sizes[c]:
+                    istate[FAILED_SETS] -= 1
+                counts[c] -= 1
+        else:
+            fstate[REPAIR_COSTS] += cr
+            for c in incidence[k]:
+                counts[c] += 1
+                if counts[c] == sizes[c]:
+                    istate[FAILED_SETS] += 1
+        # Check system status and update counters
+        elapsed = event_time - fstate[T]
+        if istate[FAILED_SETS] > 0:
+            if fstate[TTF] == end:
+                fstate[TTF] = event_time
+            if istate[FAIL_FLAG]:
+                fstate[DOWNTIME] += elapsed
+            else:
+                fstate[TBF] += elapsed
+                # Running mean of the times between failures
+                istate[TBF_COUNT] += 1
+                fstate[TBF_MEAN] += (fstate[TBF] - fstate[TBF_MEAN]) / istate[TBF_COUNT]
+                istate[FAIL_FLAG] = 1
+                fstate[TBF] = 0
+        else:
+            if istate[FAIL_FLAG]:
+                fstate[DOWNTIME] += elapsed
+                istate[FAIL_FLAG] = 0
+            else:
+                fstate[TBF] += elapsed
+        # Advance clock
+        fstate[T] = min(event_time, end)
+    return -1
+
+
+if numba is not None:
+    before = numba.njit(cache=True)(before)
+    sift_down = numba.njit(cache=True)(sift_down)
+    compiled_events = numba.njit(cache=True)(run_events)
+else:
+    compiled_events = None
+
+
+def simulate_kernel(m, n, r, s, end, lam, mu, rng=None, criterion=None, kernel=run_events):
+    # Same arguments, random stream and results as reliability_analysis.simulate, with the event
+    # loop run by kernel; the variate pools are refilled between kernel calls
+    if criterion is None:
+        criterion = criteria.Windows(r, s)
+    cm = 0.25
+    sampler = Sampler(rng)
+    pools = [sampler.pool('exponential', lam), sampler.pool('exponential', mu)]
+    # Planned failures of every node k = i * n + j, drawn like LatticeState does
+    next_time = np.array([pools[0].draw() for _ in range(m * n)], dtype=np.float64)
+    maintenance_costs = 0
+    for next_event in next_time.tolist():
+        maintenance_costs += round(cm * next_event, 6)
+    # With lam == mu both periods come from one pool and share its buffer
+    shared = pools[1] is pools[0]
+    buffers = [np.array(list(pool.values), dtype=np.float64) for pool in pools]
+    positions = np.zeros(2, dtype=np.int64)
+    heap = np.array(sorted(range(m * n), key=lambda k: (next_time[k], k)), dtype=np.int64)
+    up = np.ones(m * n, dtype=np.bool_)
+    incidence, sizes = incidence_arrays(m, n, criterion.cut_sets(m, n))
+    counts = np.zeros(len(sizes), dtype=np.int64)
+    fstate = np.zeros(7)
+    fstate[TTF] = end
+    fstate[MAINTENANCE_COSTS] = maintenance_costs
+    istate = np.zeros(3, dtype=np.int64)
+    while True:
+        pool = kernel(end, heap, next_time, up, incidence, sizes, counts, buffers[0], buffers[1], shared, positions, fstate, istate)
+        if pool < 0:
+            break
+        pools[pool].refill()
+        buffers[pool] = np.array(list(pools[pool].values), dtype=np.float64)
+        positions[pool] = 0
+    # If the system never failed, TBF and TTF are set to the simulated time span
+    mean_TBF = fstate[TBF_MEAN] if istate[TBF_COUNT] else end
+    return (
+        fstate[DOWNTIME] / end,
+        fstate[TTF],
+        mean_TBF,
+        fstate[REPAIR_COSTS],
+        fstate[MAINTENANCE_COSTS],
+    )
+
+
+def simulate(m, n, r, s, end, lam, mu, rng=None, criterion=None):
+    # Compiled event loop when Numba is installed, otherwise the pure-Python simulate()
+    if compiled_events is None:
+        return simulate_events(m, n, r, s, end, lam, mu, rng, criterion)
+    return simulate_kernel(m, n, r, s, end, lam, mu, rng, criterion, compiled_events)
@@ -0,0 +1,78 @@
+import numpy as np
+from reliability_analysis.sampling import Sampler
+
+
+class LatticeState:
+    def __init__(self, m, n, lam=10, mu=10, rng=None, sampler=None, streams=None):
+        # Node statuses and next event times of the whole lattice, stored as two arrays
+        # Uptime rate (lam) and downtime rate (mu); they give average periods until event
+        self.m = m
+        self.n = n
+        self.lam = lam
+        self.mu = mu
+        # Periods are taken from pre-drawn pools fed by rng (the global numpy state without one),
+        # or from every node's own streams when given NodeStreams
+        self.sampler = Sampler(rng) if sampler is None else sampler
+        if streams is None:
+            self.draw_up = [self.sampler.exponential(lam)] * (m * n)
+            self.draw_down = [self.sampler.exponential(mu)] * (m * n)
+        else:
+            draws = [streams.draws(i, j, lam, mu) for i in range(m) for j in range(n)]
+            self.draw_up = [draw_up for draw_up, _ in draws]
+            self.draw_down = [draw_down for _, draw_down in draws]
+        self.status = np.ones((m, n), dtype=bool)
+        self.next_event = np.array([draw() for draw in self.draw_up], dtype=np.float64).reshape(m, n)
+        # Flat views used by the event loop, indexed by k = i * n + j
+        self.status_flat = self.status.reshape(-1)
+        self.next_flat = self.next_event.reshape(-1)
+
+    def update(self, k, event, current_time):
+        # Boolean event decides if uptime or downtime computed; returns the node's next event time
+        if event:
+            next_event = current_time + self.draw_up[k]()
+        else:
+            next_event = current_time + self.draw_down[k]()
+        self.status_flat[k] = event
+        self.next_flat[k] = next_event
+        return next_event
+
+    def __len__(self):
+        return self.m
+
+    def __getitem__(self, i):
+        # lattice[i][j] gives a Node-compatible view, so code written for Node grids keeps working
+        return LatticeRow(self, i % self.m)
+
+    def __iter__(self):
+        # Indexing wraps around, so iteration has to stop at the last row explicitly
+        return (LatticeRow(self, i) for i in range(self.m))
+
+
+class LatticeRow:
+    def __init__(self, lattice, i):
+        self.lattice = lattice
+        self.i = i
+
+    def __len__(self):
+        return self.lattice.n
+
+    def __getitem__(self, j):
+        return NodeView(self.lattice, self.i * self.lattice.n + j % self.lattice.n)
+
+    def __iter__(self):
+        return (self[j] for j in range(self.lattice.n))
+
+
+class NodeView:
+    def __init__(self, lattice, k):
+        self.lattice = lattice
+        self.k = k
+
+    def update(self, event, current_time):
+        self.lattice.update(self.k, event, current_time)
+
+    def getStatus(self):
+        return bool(self.lattice.status_flat[self.k])
+
+    def getNext(self):
+        return float(self.lattice.next_flat[self.k])
@@ -0,0 +1,139 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import bicgstab, expm_multiply
+from reliability_analysis.criteria import Windows
+
+# The chain has 2 ** (m * n) states; 16 nodes give 65536 states
+MAX_NODES = 16
+
+
+def lattice_states(m, n):
+    # State s has bit k set when node k = i * n + j is down
+    if m * n > MAX_NODES:
+        raise ValueError(f"Markov solver supports at most {MAX_NODES} nodes, got {m} x {n}")
+    states = np.arange(2 ** (m * n), dtype=np.int64)
+    down = (states[:, None] >> np.arange(m * n)) & 1
+    return states, down
+
+
+def failed_states(m, n, r, s, wrap=True, criterion=None):
+    # States where all nodes of some cut set of the criterion are down; by default the same
+    # criterion as check_system, some r x s window has all its nodes down
+    if criterion is None:
+        criterion = Windows(r, s, wrap)
+    states, _ = lattice_states(m, n)
+    failed = np.zeros(len(states), dtype=bool)
+    for cells in criterion.cut_sets(m, n):
+        mask = sum(1 << k for k in cells)
+        failed |= (states & mask) == mask
+    return failed
+
+
+def generator_matrix(m, n, lam, mu, absorbing=None):
+    # Sparse generator: every up node fails at rate 1 / lam, every down node is repaired at rate 1 / mu
+    # (lam and mu are the mean up and repair times); rows of absorbing states are left empty
+    states, down = lattice_states(m, n)
+    rows = []
+    cols = []
+    rates = []
+    for k in range(m * n):
+        source = states if absorbing is None else states[~absorbing]
+        rows.append(source)
+        cols.append(source ^ (1 << k))
+        rates.append(np.where(down[source, k], 1 / mu, 1 / lam))
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    rates = np.concatenate(rates)
+    Q = sparse.coo_matrix((rates, (rows, cols)), shape=(len(states), len(states))).tocsr()
+    return Q - sparse.diags(np.asarray(Q.sum(axis=1)).ravel())
+
+
+def integrate(Q, rewards, end):
+    # Distribution at end, starting from all nodes up, plus for every reward vector f the
+    # integrals F(end) = int_0^end p(t) f dt and int_0^end F(t) dt
+    size = Q.shape[0]
+    K = rewards.shape[1]
+    A = sparse.bmat([
+        [Q.T, None, None],
+        [sparse.csr_matrix(rewards.T), None, None],
+        [None, sparse.identity(K), None],
+    ], format='csr')
+    A.resize((size + 2 * K, size + 2 * K))
+    y = np.zeros(size + 2 * K)
+    y[0] = 1
+    y = expm_multiply(A * end, y)
+    return y[:size], y[size:size + K], y[size + K:]
+
+
+def steady_state(m, n, lam, mu):
+    # Stationary distribution; nodes fail and get repaired independently, so it is the product
+    # of the per-node probabilities of being down, mu / (lam + mu)
+    _, down = lattice_states(m, n)
+    p_down = mu / (lam + mu)
+    return np.prod(np.where(down, p_down, 1 - p_down), axis=1)
+
+
+def mean_time_to_absorption(Q, transient):
+    # Expected time until the chain leaves the transient states, starting from the first of them
+    Q_transient = -Q[transient][:, transient]
+    times, info = bicgstab(Q_transient.tocsr(), np.ones(len(transient)), rtol=1e-12, atol=0)
+    if info != 0:
+        raise RuntimeError(f"MTTF solve did not converge (info={info})")
+    return times[0]
+
+
+def solve(m, n, r, s, end, lam, mu, wrap=True, criterion=None):
+    # Exact expectations of the metrics simulate() returns, averaged over runs; like simulate(),
+    # the first event after end is still processed
+    cr = 0.5
+    cm = 0.25
+    states, down = lattice_states(m, n)
+    failed = failed_states(m, n, r, s, wrap, criterion)
+    down_nodes = down.sum(axis=1)
+    up_nodes = m * n - down_nodes
+    failure_rate = up_nodes / lam
+    repair_rate = down_nodes / mu
+    total_rate = failure_rate + repair_rate
+    # Repairable chain: downtime, node failures and node repairs over [0, end]
+    Q = generator_matrix(m, n, lam, mu)
+    rewards = np.column_stack([failed, failure_rate, repair_rate]).astype(float)
+    p, totals, cumulative = integrate(Q, rewards, end)
+    downtime, failures, repairs = totals
+    # Overshoot: the event after end extends a running downtime and may be a failure or a repair
+    overshoot_downtime = np.sum(p[failed] / total_rate[failed])
+    overshoot_failures = np.sum(p * failure_rate / total_rate)
+    overshoot_repairs = p * repair_rate / total_rate
+    # Every repair at time t adds cm * (t + lam), the planned time of the node's next failure
+    repair_times = end * repairs - cumulative[2]
+    maintenance = m * n * lam + repair_times + lam * repairs
+    maintenance += np.sum(overshoot_repairs * (end + 1 / total_rate + lam))
+    # Chain absorbed at the first system failure: TTF truncated at end, and the untruncated MTTF
+    absorbing = generator_matrix(m, n, lam, mu, absorbing=failed)
+    alive = (~failed).astype(float)
+    p_alive, (truncated_ttf,), _ = integrate(absorbing, alive[:, None], end)
+    leads_to_failure = np.zeros(len(states))
+    for k in range(m * n):
+        target = failed[states ^ (1 << k)] & (down[:, k] == 0)
+        leads_to_failure += np.where(target, 1 / lam, 0)
+    TTF = truncated_ttf + np.sum(p_alive * alive * leads_to_failure / total_rate ** 2)
+    MTTF_unbounded = mean_time_to_absorption(absorbing, np.flatnonzero(~failed))
+    # Long-run availability and mean up time between system failures
+    pi = steady_state(m, n, lam, mu)
+    availability = pi[~failed].sum()
+    system_failure_frequency = np.sum(pi * leads_to_failure * ~failed)
+    MTBF_steady_state = availability / system_failure_frequency if system_failure_frequency > 0 else np.inf
+    # Metrics in the units main() prints them
+    reliability = 1 - (downtime + overshoot_downtime) / end
+    avg_r = round(cr * (failures + overshoot_failures), 6)
+    avg_m = round(cm * maintenance, 6)
+    return {
+        'breakeven_profit': round((avg_r + avg_m) / (reliability * end), 6),
+        'reliability': reliability,
+        'MTTF': TTF,
+        'MTBF_steady_state': MTBF_steady_state,
+        'avg_r': avg_r,
+        'avg_m': avg_m,
+        'downtime': 1 - reliability,
+        'steady_state_reliability': availability,
+        'MTTF_unbounded': MTTF_unbounded,
+    }
@@ -0,0 +1,192 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from reliability_analysis.reliability_analysis import simulate
+from reliability_analysis.batch_engine import simulate_batch
+from reliability_analysis import kernel
+from reliability_analysis import adaptive, criteria
+from reliability_analysis.plugins import REGISTRY
+from reliability_analysis.cache import cache_key
+from reliability_analysis.accumulators import make_run_stats
+from reliability_analysis.sampling import NodeStreams
+
+# Runs per task; fixed so that the random streams do not depend on the number of workers
+CHUNK_RUNS = 25
+# Runs the batch engine simulates together, one stream per block; a batch can set batch_block.
+# Also fixed, since the block size decides the runs
+BATCH_BLOCK_RUNS = 4000
+# Simulation parameters main() uses when a batch does not set them
+SIMULATION_DEFAULTS = {'m': 3, 'n': 3, 'r': 2, 's': 2, 'engine': 'event'}
+# Keys that only decide how many runs a batch gets, not what a run returns
+RUN_CONTROL_KEYS = ('runs', 'target_rel_width', 'max_runs', 'confidence', 'quantiles')
+
+
+def is_simulated(batch):
+    # Batches estimated from runs of simulate(), rather than by another solver
+    return batch.get('solver', 'simulation') == 'simulation'
+
+
+def batch_params(batch):
+    # Normalized simulation parameters of a batch as a JSON string
+    params = dict(SIMULATION_DEFAULTS, **batch)
+    return json.dumps({key: value for key, value in params.items() if key not in RUN_CONTROL_KEYS}, sort_keys=True)
+
+
+def batch_spawn_key(batch):
+    # Stable integer words identifying the batch parameters
+    digest = hashlib.sha256(batch_params(batch).encode()).digest()
+    return tuple(int.from_bytes(digest[i:i + 4], 'little') for i in range(0, 16, 4))
+
+
+def run_seed_sequence(seed, batch, k):
+    # Independent stream of run k of a batch; the same for any number of runs or workers
+    return np.random.SeedSequence(seed, spawn_key=batch_spawn_key(batch) + (k,))
+
+
+def task_runs(batch):
+    # Runs per task of a batch: whole blocks for the batch engine, which vectorizes across them
+    params = dict(SIMULATION_DEFAULTS, **batch)
+    if params['engine'] == 'batch':
+        return params.get('batch_block', BATCH_BLOCK_RUNS)
+    return CHUNK_RUNS
+
+
+def uses_node_streams(batch):
+    return bool(batch.get('crn') or batch.get('antithetic'))
+
+
+def node_streams(seed, batch, k):
+    # Per-node streams of run k of a batch with common random numbers (crn: true) or antithetic
+    # runs (antithetic: true). With crn they depend on the seed and the run only, so run k of any
+    # two such batches is paired; antithetic runs 2j and 2j + 1 share their streams, the second
+    # drawing from the complementary uniforms
+    antithetic = 0
+    if batch.get('antithetic'):
+        k, antithetic = divmod(k, 2)
+    if batch.get('crn'):
+        sequence = np.random.SeedSequence(seed, spawn_key=(k,))
+    else:
+        sequence = run_seed_sequence(seed, batch, k)
+    return NodeStreams(sequence, antithetic=bool(antithetic))
+
+
+def run_task(task, profile=None):
+    # Simulate runs [start, stop) of a batch; returns the five metrics as lists. A
+    # profiling.Profile collects the timing of event-engine runs
+    seed, batch, start, stop = task
+    params = dict(SIMULATION_DEFAULTS, **batch)
+    # An extension of the batch that defines simulate runs the batch instead, given its
+    # parameters by name like the simulator of a sweep point
+    simulator = REGISTRY.simulator(params.get('extension_modules', ()))
+    if simulator is not None:
+        from reliability_analysis import sweep
+
+        params['simulator'] = f'{simulator.__module__}:{simulator.__name__}'
+        return sweep.run_task((seed, params, start, stop), profile)
+    args = (params['m'], params['n'], params['r'], params['s'], params['end'], params['lam'], params['mu'])
+    criterion = criteria.from_config(params['criterion']) if 'criterion' in params else None
+    if uses_node_streams(params):
+        if params['engine'] != 'event':
+            raise ValueError("Common random numbers (crn) and antithetic runs need the event engine")
+        results = [
+            simulate(
+                *args, criterion=criterion, streams=node_streams(seed, batch, k),
+                metrics=params.get('metrics'), profile=profile,
+            )
+            for k in range(start, stop)
+        ]
+        return [list(metric) for metric in zip(*results)]
+    if params['engine'] != 'event' and params.get('metrics') is not None:
+        raise ValueError("Only the event engine computes a subset of the metrics (metrics)")
+    if params['engine'] != 'event' and profile is not None:
+        raise ValueError("Only runs of the event engine can be profiled")
+    if params['engine'] == 'batch':
+        # The batch engine shares one stream per block of runs; the whole block is simulated so
+        # run k gives the same results whichever range it is requested in
+        size = task_runs(params)
+        block, offset = divmod(start, size)
+        rng = np.random.default_rng(run_seed_sequence(seed, batch, block))
+        metrics = simulate_batch(*args, size, rng, criterion=criterion)
+        return [list(metric[offset:offset + stop - start]) for metric in metrics]
+    # The compiled kernel gives the same runs as simulate(), only faster; simulate() can skip
+    # the metrics a batch does not need (metrics: [TTF])
+    results = []
+    for k in range(start, stop):
+        rng = np.random.default_rng(run_seed_sequence(seed, batch, k))
+        if params['engine'] == 'kernel':
+            results.append(kernel.simulate(*args, rng, criterion))
+        else:
+            results.append(simulate(*args, rng, criterion, metrics=params.get('metrics'), profile=profile))
+    return [list(metric) for metric in zip(*results)]
+
+
+def make_tasks(config, seed, ranges):
+    # Chunks of runs [start, stop) of the batches in ranges, split at multiples of their task
+    # runs and tagged with the index of their batch
+    batches = list(config.values())
+    tasks = []
+    for b, (start, stop) in ranges.items():
+        size = task_runs(batches[b])
+        while start < stop:
+            chunk_stop = min(start - start % size + size, stop)
+            tasks.append((b, (seed, batches[b], start, chunk_stop)))
+            start = chunk_stop
+    return tasks
+
+
+def run_batches(config, seed, workers=1, cache=None, store=None):
+    # Simulate every batch of a config; returns per batch the streaming statistics (RunStats) of its
+    # runs, so memory does not grow with the number of runs
+    # Runs found in the cache (a ResultCache) are reused, new runs are added to it; every run is
+    # also appended to the store (a ResultStore) when given
+    batches = list(config.values())
+    keys = [cache_key(batch_params(batch), seed) for batch in batches]
+    results = [make_run_stats(batch) for batch in batches]
+    # Batches solved with the Markov chain or by splitting need no runs of simulate()
+    ranges = {b: (0, batch['runs']) for b, batch in enumerate(batches) if is_simulated(batch)}
+    if store is not None:
+        names = list(config)
+        batch_ids = {b: store.add_batch(names[b], json.loads(batch_params(batches[b])), seed) for b in ranges}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while ranges:
+            # Take what the cache has of every range and simulate only the missing tail
+            missing = {}
+            for b, (start, stop) in ranges.items():
+                if cache is not None:
+                    cached = cache.load(keys[b], start, stop)
+                    results[b].extend(cached)
+                    if store is not None and cached[0]:
+                        store.append(batch_ids[b], start, cached)
+                    start = results[b].count
+                if start < stop:
+                    missing[b] = (start, stop)
+            tasks = make_tasks(config, seed, missing)
+            if executor is not None:
+                chunks = executor.map(run_task, [task for _, task in tasks])
+            else:
+                chunks = map(run_task, [task for _, task in tasks])
+            # Chunks come back in submission order, so every batch gets its runs in order
+            for (b, (_, _, start, _)), chunk in zip(tasks, chunks):
+                results[b].extend(chunk)
+                if cache is not None:
+                    cache.store(keys[b], start, chunk)
+                if store is not None:
+                    store.append(batch_ids[b], start, chunk)
+            # Adaptive batches get further rounds of runs until their intervals meet the targets
+            next_ranges = {}
+            for b in ranges:
+                if adaptive.is_adaptive(batches[b]):
+                    runs = results[b].count
+                    extra = adaptive.next_runs(batches[b], results[b], task_runs(batches[b]))
+                    if batches[b].get('antithetic'):
+                        # Keep antithetic pairs whole
+                        extra += extra % 2
+                    if extra:
+                        next_ranges[b] = (runs, runs + extra)
+            ranges = next_ranges
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
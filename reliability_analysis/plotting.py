@@ -0,0 +1,13 @@
+# matplotlib is only needed to draw results, so simulation modules import it through pyplot()
+# when they plot, not at import time: worker processes and the core package start without it
+
+
+def pyplot(backend=None):
+    # matplotlib.pyplot, with the given backend (e.g. 'TkAgg') selected first
+    import matplotlib
+
+    if backend is not None:
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+
+    return plt
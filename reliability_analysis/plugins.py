@@ -0,0 +1,76 @@
+import importlib
+import os
+import warnings
+
+# Directory scanned for extensions: <name>/<name>.py or <name>.py
+EXTENSIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extensions')
+EXTENSIONS_PACKAGE = 'reliability_analysis.extensions'
+# Names an extension module may define to replace the core ones
+OVERRIDES = ('Node', 'check_system', 'simulate')
+
+
+class PluginRegistry:
+    def __init__(self, path=EXTENSIONS_PATH, package=EXTENSIONS_PACKAGE):
+        # Extensions found under path, imported as submodules of package on first use and kept
+        # for the life of the process, so batches sharing an extension execute it once
+        self.path = path
+        self.package = package
+        self.found = None
+        self.modules = {}
+
+    def discover(self):
+        # Module names of the extensions by extension name, scanned once
+        if self.found is None:
+            self.found = {}
+            for entry in sorted(os.listdir(self.path)):
+                if os.path.isfile(os.path.join(self.path, entry, entry + '.py')):
+                    self.found[entry] = f'{self.package}.{entry}.{entry}'
+                elif entry.endswith('.py') and entry != '__init__.py':
+                    self.found[entry[:-3]] = f'{self.package}.{entry[:-3]}'
+        return self.found
+
+    def names(self):
+        return list(self.discover())
+
+    def load(self, name):
+        if name not in self.modules:
+            found = self.discover()
+            if name not in found:
+                raise ValueError(f"Unknown extension {name}, expected one of {sorted(found)}")
+            self.modules[name] = importlib.import_module(found[name])
+        return self.modules[name]
+
+    def overrides(self, names):
+        # Override name -> object defined by the extensions names; later extensions win. Names
+        # an extension imports from elsewhere do not count
+        resolved = {}
+        for name in names:
+            module = self.load(name)
+            for override in OVERRIDES:
+                value = getattr(module, override, None)
+                if getattr(value, '__module__', None) == module.__name__:
+                    resolved[override] = value
+        return resolved
+
+    def override(self, names, override):
+        # One override of the extensions names, None when none of them defines it
+        return self.overrides(names).get(override)
+
+    def simulator(self, names):
+        # The simulate override of the extensions names, None when they define none. The engines
+        # keep their own lattice and criteria, so Node and check_system overrides take effect
+        # only through an extension's simulate; without one they are ignored, with a warning
+        overrides = self.overrides(names)
+        if 'simulate' not in overrides:
+            unused = [override for override in OVERRIDES if override in overrides]
+            if unused:
+                warnings.warn(
+                    f"Extensions {list(names)} override {', '.join(unused)} but not simulate; the engines "
+                    f"only run an extension's own simulate, so these batches use the core model",
+                    stacklevel=2,
+                )
+        return overrides.get('simulate')
+
+
+# Registry of the process; worker processes build their own on first use
+REGISTRY = PluginRegistry()
@@ -0,0 +1,91 @@
+import time
+
+# Phases of a simulate() run: building the lattice and the calendar, taking and scheduling
+# events, drawing the nodes' next periods, costs and downtime counters, and the failure check.
+# The extension simulators count scheduling a node's next event under sampling
+PHASES = ('setup', 'queue', 'sampling', 'accounting', 'check')
+# Runs of every batch profiled by main() with --profile
+PROFILE_RUNS = 20
+
+
+class Profile:
+    def __init__(self):
+        # Counters and per-phase wall time of the runs of one batch. simulate() marks the end of
+        # every phase with lap(), which adds the time since the previous lap, so one clock read
+        # per phase is all the bookkeeping; runs without a profile skip it entirely
+        self.runs = 0
+        self.transitions = 0
+        self.seconds = 0.0
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.started = None
+        self.mark = None
+
+    def start(self):
+        self.started = self.mark = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.times[phase] += now - self.mark
+        self.calls[phase] += 1
+        self.mark = now
+
+    def stop(self, transitions):
+        # End of a run with its number of system state changes (failures and recoveries)
+        self.seconds += time.perf_counter() - self.started
+        self.runs += 1
+        self.transitions += transitions
+
+    @property
+    def events(self):
+        # Every event draws the next period of its node
+        return self.calls['sampling']
+
+    @property
+    def checks(self):
+        return self.calls['check']
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.transitions += other.transitions
+        self.seconds += other.seconds
+        for phase in PHASES:
+            self.times[phase] += other.times[phase]
+            self.calls[phase] += other.calls[phase]
+        return self
+
+    def summary(self):
+        # Totals, events per second and the share of run time spent in every phase
+        return {
+            'runs': self.runs,
+            'events': self.events,
+            'checks': self.checks,
+            'transitions': self.transitions,
+            'seconds': self.seconds,
+            'events_per_second': self.events / self.seconds if self.seconds else 0.0,
+            'shares': {phase: self.times[phase] / self.seconds if self.seconds else 0.0 for phase in PHASES},
+        }
+
+    def format(self):
+        summary = self.summary()
+        lines = [
+            f"Profile: {summary['runs']} runs, {summary['events']} events, {summary['checks']} checks, "
+            f"{summary['transitions']} transitions in {summary['seconds']:.4g} s "
+            f"({summary['events_per_second']:.0f} events/s)"
+        ]
+        for phase, share in summary['shares'].items():
+            lines.append(f"  {phase}: {share:.1%}")
+        return "\n".join(lines)
+
+
+def profile_runs(params, seed, runs=PROFILE_RUNS):
+    # Profile of the first runs of a batch or sweep point, simulated again in this process with
+    # the same random streams as the original runs. Phases are those of the event engine, also
+    # for batches run with the kernel or batch engine
+    from reliability_analysis import sweep
+
+    profile = Profile()
+    if 'simulator' not in params:
+        params = dict(params, engine='event')
+    sweep.run_task((seed, params, 0, min(runs, params['runs'])), profile)
+    return profile
@@ -1,17 +1,32 @@
 import numpy as np
-from queue import PriorityQueue
 import math
-import yaml
-import importlib
 import sys
-import os
+import argparse
+from reliability_analysis import criteria
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.event_calendar import EventCalendar
+from reliability_analysis import adaptive
+from reliability_analysis.cache import CACHE_PATH, ResultCache
+from reliability_analysis.store import ResultStore
+from reliability_analysis.profiling import PROFILE_RUNS
+from reliability_analysis.plugins import REGISTRY
+from reliability_analysis.accumulators import METRICS, RunningStats
 
 
 class Node:
-    def __init__(self, lam=10, mu=10):
+    def __init__(self, lam=10, mu=10, rng=None, sampler=None):
         # Uptime rate (lam) and downtime rate (mu); they give average periods until event
+        # Draws come from the pools of a Sampler when given, otherwise one at a time from the
+        # np.random.Generator (or the global numpy state without one)
+        if sampler is None:
+            rng = np.random if rng is None else rng
+            self.__draw_up = lambda: rng.exponential(lam)
+            self.__draw_down = lambda: rng.exponential(mu)
+        else:
+            self.__draw_up = sampler.exponential(lam)
+            self.__draw_down = sampler.exponential(mu)
         self.__status = True
-        self.__next_event = np.random.exponential(lam)
+        self.__next_event = self.__draw_up()
         self.__lam = lam
         self.__mu = mu
 
@@ -19,10 +34,10 @@ class Node:
         # Boolean event decides if uptime or downtime computed; setter for status and next event
         if event:
             self.__status = True
-            self.__next_event = current_time + np.random.exponential(self.__lam)
+            self.__next_event = current_time + self.__draw_up()
         else:
             self.__status = False
-            self.__next_event = current_time + np.random.exponential(self.__mu)
+            self.__next_event = current_time + self.__draw_down()
 
     def getStatus(self):
         return self.__status
@@ -32,144 +47,248 @@ class Node:
 
 
 def check_system(r, s, lattice):
-    m = len(lattice)
-    n = len(lattice[0])
-    #Building transformed matrix
-    transformed_matrix = []
-    flag = 0
-    for i in range(m):
-        transformed_row = []
-        for j in range(n + s - 1):
-            #Scan the lattice for dangerous rows, hopping over columns' end
-            if not lattice[i % m][j % n].getStatus():
-                flag += 1
-                if flag == s:
-                    transformed_row.append((j-s+1) % n)
-                    flag -= 1
-            else:
-                flag = 0
-        transformed_matrix.append(transformed_row)
-    #Scan transformed matrix to see if it's broken, hopping over rows' end
-    for row in range(m + r - 1):
-        #Build intersection of the r rows
-        init_set = set(transformed_matrix[row % m])
-        for more in range(r):
-            init_set = init_set & set(transformed_matrix[(row + more) % m])
-        if (init_set):
-                return 0
-    return 1
-
-
-def simulate(m, n, r, s, end, lam, mu):
+    # 0 when some r x s window (wrapping around rows and columns) has all nodes down, else 1
+    return criteria.Windows(r, s).check_system(lattice)
+
+
+def simulate(m, n, r, s, end, lam, mu, rng=None, criterion=None, streams=None, metrics=None, profile=None):
     # Cost parameters
     cr = 0.5
     cm = 0.25
+    # Metrics the caller needs (all of METRICS by default); the others are returned as nan and
+    # not computed. Without downtime, TTF and TBF the system state is not tracked, and a run
+    # asked for TTF alone stops at the first system failure
+    needed = set(METRICS if metrics is None else metrics)
+    if not needed <= set(METRICS):
+        raise ValueError(f"Unknown metrics {sorted(needed - set(METRICS))}, expected some of {METRICS}")
+    maintenance = 'maintenance_costs' in needed
+    track = not needed.isdisjoint(('downtime', 'TTF', 'TBF'))
+    until_failure = needed == {'TTF'}
+    # Per-phase timing and counters of the run when a profiling.Profile is given
+    profiling = profile is not None
+    if profiling:
+        profile.start()
     # Initiate clock, counters, and a false failure indicator
     t = 0
     fail_flag = 0
     TTF = end
     TBF = 0
-    TBF_history = []
+    TBF_stats = RunningStats()
     total_downtime = 0
     repair_costs = 0
     maintenance_costs = 0
     # Initiate queue of failures and repairs
-    event_queue = PriorityQueue()
-    # Create latice and fill with nodes, record planned failures
-    lattice = np.empty((m, n), dtype=object)
-    for i in range(m):
-        for j in range(n):
-            lattice[i][j] = Node()
-            event_queue.put((lattice[i][j].getNext(), True, m * i + j))
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+    event_queue = EventCalendar()
+    # Create latice state arrays, record planned failures of every node k = i * n + j
+    lattice = LatticeState(m, n, lam, mu, rng, streams=streams)
+    for k, next_event in enumerate(lattice.next_flat.tolist()):
+        event_queue.put((next_event, True, k))
+        if maintenance:
+            maintenance_costs += round(cm * next_event, 6)
+    # Failure state of the lattice, updated one node at a time; by default r x s windows fail it
+    if criterion is None:
+        criterion = criteria.Windows(r, s)
+    tracker = criterion.tracker(m, n) if track else None
+    if profiling:
+        profile.lap('setup')
     # Simulation
     while t < end:
         # Get features of next event
-        next_time, next_status, next_node = event_queue.get()
-        i = next_node // m
-        j = next_node % n
+        next_time, next_status, k = event_queue.get()
+        i, j = divmod(k, n)
         # Update node and event queue (making event happen)
-        lattice[i][j].update(not next_status, next_time)
-        event_queue.put((lattice[i][j].getNext(), lattice[i][j].getStatus(), m * i + j))
+        status = not next_status
+        if profiling:
+            profile.lap('queue')
+        next_event = lattice.update(k, status, next_time)
+        if profiling:
+            profile.lap('sampling')
+        event_queue.put((next_event, status, k))
+        if profiling:
+            profile.lap('queue')
         # Update costs depending on node event
-        if lattice[i][j].getStatus():
-            maintenance_costs += round(cm * lattice[i][j].getNext(), 6)
+        if status:
+            if maintenance:
+                maintenance_costs += round(cm * next_event, 6)
         else:
             repair_costs += cr
         # Check system status and update counters
-        system_status = check_system(r, s, lattice)
-        if system_status == 0 and TTF == end:
-            TTF = next_time
-        if system_status == 0:
-            if fail_flag:
-                total_downtime += next_time - t
+        if track:
+            if profiling:
+                profile.lap('accounting')
+            tracker.update(i, j, status)
+            system_status = tracker.check_system()
+            if profiling:
+                profile.lap('check')
+            if system_status == 0 and TTF == end:
+                TTF = next_time
+                if until_failure:
+                    break
+            if system_status == 0:
+                if fail_flag:
+                    total_downtime += next_time - t
+                else:
+                    TBF += next_time - t
+                    TBF_stats.add(TBF)
+                    fail_flag = 1
+                    TBF = 0
             else:
-                TBF += next_time - t
-                TBF_history.append(TBF)
-                fail_flag = 1
-                TBF = 0
-        else:
-            if fail_flag:
-                total_downtime += next_time - t
-                fail_flag = 0
-            else:
-                TBF += next_time - t
+                if fail_flag:
+                    total_downtime += next_time - t
+                    fail_flag = 0
+                else:
+                    TBF += next_time - t
         # Advance clock
         t = min(next_time, end)
+        if profiling:
+            profile.lap('accounting')
+    if profiling:
+        # Every failure but a last unfinished one was followed by a recovery
+        profile.stop(2 * TBF_stats.count - fail_flag)
     # If the system never failed, TBF and TTF are set to the simulated time span
-    if not TBF_history:
-        TBF_history.append(end)
-    return (
+    if TBF_stats.count == 0:
+        TBF_stats.add(end)
+    results = (
         total_downtime / end,
         TTF,
-        np.mean(TBF_history),
+        TBF_stats.mean,
         repair_costs,
         maintenance_costs,
     )
+    return tuple(value if metric in needed else math.nan for metric, value in zip(METRICS, results))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Simulate the batches of a configuration file")
+    parser.add_argument("--config", default="config.yaml", help="YAML file with the batches to simulate")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="root seed; results do not depend on --workers")
+    parser.add_argument(
+        "--cache", nargs="?", const=CACHE_PATH, default=None, metavar="PATH",
+        help="reuse and store runs in an SQLite result cache (default path: .cache/results.sqlite)",
+    )
+    parser.add_argument("--table", default=None, help="CSV file for the results table of sweep batches (default: stdout)")
+    parser.add_argument("--store", default=None, metavar="DIR", help="append every run to a columnar result store in DIR")
+    parser.add_argument(
+        "--profile", type=int, nargs="?", const=PROFILE_RUNS, default=None, metavar="RUNS",
+        help=f"time the phases of the first RUNS runs of every batch (default: {PROFILE_RUNS})",
+    )
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv=None):
+    from reliability_analysis.parallel import SIMULATION_DEFAULTS, is_simulated, run_batches, run_seed_sequence
+    from reliability_analysis.sweep import run_sweeps
+    from reliability_analysis import profiling, variance_reduction
+    import yaml
+
+    args = parse_args([] if argv is None else argv)
     # Load Simulation Settings
-    with open("config.yaml", 'r') as f:
+    with open(args.config, 'r') as f:
         config = yaml.safe_load(f)
     print(config)
+    # Without a seed, draw one and print it so the results can be reproduced
+    seed = args.seed
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Seed: {seed}")
+    # Batches with a sweep section are planned separately and reported as one table
+    sweeps = {batch_name: batch for batch_name, batch in config.items() if 'sweep' in batch}
+    config = {batch_name: batch for batch_name, batch in config.items() if 'sweep' not in batch}
+    # Extensions of all batches are imported and checked once, up front, so unknown names fail
+    # early and overrides the engines cannot use are reported before any runs
+    for batch in config.values():
+        REGISTRY.simulator(batch.get('extension_modules', ()))
+    # Runs of all batches are shared across the worker processes
+    cache = None if args.cache is None else ResultCache(args.cache)
+    store = None if args.store is None else ResultStore(args.store)
+    try:
+        results = run_batches(config, seed, args.workers, cache, store)
+    finally:
+        if cache is not None:
+            cache.close()
+        if store is not None:
+            store.flush()
     for i, (batch_name, batch) in enumerate(config.items()):
-        print(f"Simulating Batch {i + 1} of {len(config)} - {batch_name}")
-        for module_name in batch['extension_modules']:
-            spec = importlib.util.spec_from_file_location(module_name, os.path.join("reliability_analysis", "extensions", module_name, module_name+".py"))
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+        print(f"Simulated Batch {i + 1} of {len(config)} - {batch_name}")
         # Number of periods to simulate and metrics
         end = batch['end']
-        reliability = []
-        MTTF = []
-        MTBF = []
-        avg_r = []
-        avg_m = []
-        # 10000 simulation runs
-        for i in range(batch['runs']):
-            downtime, TTF, TBF, repair_costs, maintenance_costs = simulate(3, 3, 2, 2, end, batch['lam'], batch['mu'])
-            reliability.append(downtime)
-            MTTF.append(TTF)
-            MTBF.append(TBF)
-            avg_r.append(repair_costs)
-            avg_m.append(maintenance_costs)
-        reliability = 1 - np.mean(reliability)
-        MTTF = np.mean(MTTF)
-        MTBF = np.mean(MTBF)
-        avg_r = round(np.mean(avg_r), 6)
-        avg_m = round(np.mean(avg_m), 6)
-        breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
-        print(breakeven_profit)
-        print(reliability)
-        print(MTTF)
-        print(MTBF)
-        print(avg_r)
-        print(avg_m)
-        for module in batch['extension_modules']:
-            del sys.modules[module]
+        criterion = criteria.from_config(batch['criterion']) if 'criterion' in batch else None
+        if batch.get('solver') == 'splitting':
+            # Rare-event estimates of the failure probability and MTTF by multilevel splitting,
+            # from independent splitting runs shared across the worker processes
+            from reliability_analysis import splitting
+
+            params = dict(SIMULATION_DEFAULTS, **batch)
+            rngs = [np.random.default_rng(run_seed_sequence(seed, batch, k)) for k in range(batch['runs'])]
+            solution = splitting.solve(
+                params['m'], params['n'], params['r'], params['s'], end, batch['lam'], batch['mu'], rngs,
+                criterion, batch.get('effort', splitting.DEFAULT_EFFORT), batch.get('levels'), args.workers,
+            )
+            print(f"Failure probability: {solution['failure_probability']} +/- {solution['failure_probability_se']} (SE)")
+            print(f"MTTF: {solution['MTTF']} +/- {solution['MTTF_se']} (SE)")
+            print(f"Events: {solution['events']}")
+        elif batch.get('solver') == 'markov':
+            # Exact expectations from the Markov chain of the lattice instead of simulated runs
+            from reliability_analysis import markov
+
+            params = dict(SIMULATION_DEFAULTS, **batch)
+            metrics = markov.solve(
+                params['m'], params['n'], params['r'], params['s'], end, batch['lam'], batch['mu'], criterion=criterion,
+            )
+            breakeven_profit, reliability, MTTF, MTBF, avg_r, avg_m = (
+                metrics[key] for key in ('breakeven_profit', 'reliability', 'MTTF', 'MTBF_steady_state', 'avg_r', 'avg_m')
+            )
+        else:
+            # Means of the streaming statistics of the runs
+            downtime, MTTF, MTBF, avg_r, avg_m = results[i].mean.tolist()
+            reliability = 1 - downtime
+            avg_r = round(avg_r, 6)
+            avg_m = round(avg_m, 6)
+            breakeven_profit = round((avg_r + avg_m) / (reliability * end), 6)
+        if batch.get('solver') != 'splitting':
+            print(breakeven_profit)
+            print(reliability)
+            print(MTTF)
+            if batch.get('solver') == 'markov':
+                # Long-run mean up time between system failures, not the mean TBF of runs up to end
+                print(f"MTBF_steady_state: {MTBF}")
+            else:
+                print(MTBF)
+            print(avg_r)
+            print(avg_m)
+        if adaptive.is_adaptive(batch) and is_simulated(batch):
+            # Runs used and confidence intervals of the metrics with a target
+            print(f"Runs: {results[i].count}")
+            confidence = batch.get('confidence', 0.95)
+            for metric, (estimate, half_width) in adaptive.intervals(results[i], end, confidence).items():
+                print(f"{metric}: {estimate} +/- {half_width} ({confidence:.0%} CI)")
+        if (batch.get('antithetic') or batch.get('control_variates')) and is_simulated(batch):
+            # Variance-reduced means and how many times fewer runs they need than plain means
+            params = dict(SIMULATION_DEFAULTS, **batch)
+            for metric, (estimate, factor) in variance_reduction.estimates(params, results[i]).items():
+                print(f"{metric}: {estimate} (variance reduction factor {factor:.3g})")
+        if batch.get('quantiles') and is_simulated(batch):
+            # Percentiles of the per-run metrics, estimated without storing the runs
+            for metric in METRICS:
+                percentiles = ", ".join(f"p{100 * p:g}={results[i].quantile(metric, p)}" for p in batch['quantiles'])
+                print(f"{metric}: {percentiles}")
+        if args.profile and is_simulated(batch):
+            # Events per second and where the time of the batch's runs goes
+            print(profiling.profile_runs(batch, seed, args.profile).format())
+    if sweeps:
+        print(f"Sweeping {len(sweeps)} batches")
+        try:
+            if args.table is None:
+                run_sweeps(sweeps, seed, args.workers, sys.stdout, store)
+            else:
+                with open(args.table, 'w', newline='') as out:
+                    run_sweeps(sweeps, seed, args.workers, out, store)
+        finally:
+            if store is not None:
+                store.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(sys.argv[1:]))
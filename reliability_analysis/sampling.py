@@ -0,0 +1,162 @@
+import math
+import numpy as np
+
+# Blocks start small so short runs do not draw far more variates than they use,
+# and double on every refill up to BLOCK_SIZE
+FIRST_BLOCK_SIZE = 64
+BLOCK_SIZE = 4096
+
+
+class VariatePool:
+    def __init__(self, draw_block, block_size=BLOCK_SIZE):
+        # draw_block(size) returns an array of size variates; values are handed out one at a time
+        self.draw_block = draw_block
+        self.block_size = block_size
+        self.next_size = min(FIRST_BLOCK_SIZE, block_size)
+        self.values = iter(())
+
+    def refill(self):
+        self.values = iter(self.draw_block(self.next_size).tolist())
+        self.next_size = min(2 * self.next_size, self.block_size)
+
+    def draw(self):
+        # Next pre-drawn variate as a Python float
+        for value in self.values:
+            return value
+        self.refill()
+        return next(self.values)
+
+
+def exponential_block(rng, size, mean):
+    return rng.exponential(mean, size)
+
+
+def weibull_block(rng, size, shape, scale=1.0):
+    return scale * rng.weibull(shape, size)
+
+
+def lognormal_block(rng, size, mean, sigma):
+    # mean and sigma of the logarithm of the periods
+    return rng.lognormal(mean, sigma, size)
+
+
+def gamma_block(rng, size, shape, scale=1.0):
+    return rng.gamma(shape, scale, size)
+
+
+def truncated_normal_block(rng, size, mean, sigma, low=0.0, high=math.inf):
+    # Normal periods conditioned on [low, high], by redrawing the ones outside; by default the
+    # negative ones, which a plain normal distribution produces
+    if not low < high:
+        raise ValueError(f"Empty truncation interval [{low}, {high}]")
+    values = rng.normal(mean, sigma, size)
+    outside = (values < low) | (values > high)
+    while outside.any():
+        values[outside] = rng.normal(mean, sigma, int(outside.sum()))
+        outside = (values < low) | (values > high)
+    return values
+
+
+def empirical_block(rng, size, values):
+    # Trace-driven periods: resampled from the observed ones
+    return rng.choice(np.asarray(values, dtype=float), size)
+
+
+# Period distributions by name: functions drawing a block of size periods from a generator,
+# given the distribution's parameters by name
+DISTRIBUTIONS = {
+    'exponential': exponential_block,
+    'weibull': weibull_block,
+    'lognormal': lognormal_block,
+    'gamma': gamma_block,
+    'truncated_normal': truncated_normal_block,
+    'empirical': empirical_block,
+}
+
+
+def distribution_key(spec):
+    # (name, parameters) of a distribution given as a mapping with its name under dist, e.g.
+    # {'dist': 'weibull', 'shape': 1.5, 'scale': 10}, as a hashable key
+    params = dict(spec)
+    name = params.pop('dist', None)
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution {name}, expected one of {sorted(DISTRIBUTIONS)}")
+    return (name,) + tuple(
+        (key, tuple(value) if isinstance(value, (list, tuple, np.ndarray)) else value)
+        for key, value in sorted(params.items())
+    )
+
+
+class Sampler:
+    def __init__(self, rng=None, block_size=BLOCK_SIZE):
+        # Pools of pre-drawn variates per distribution and parameters, all fed by one generator
+        # (the global numpy state without one)
+        self.rng = np.random if rng is None else rng
+        self.block_size = block_size
+        self.pools = {}
+
+    def pool(self, dist, *params):
+        # Pool drawing from rng.<dist>(*params, size=...), e.g. pool('normal', 10, 1)
+        key = (dist,) + params
+        if key not in self.pools:
+            method = getattr(self.rng, dist)
+            self.pools[key] = VariatePool(lambda size: method(*params, size=size), self.block_size)
+        return self.pools[key]
+
+    def exponential(self, scale):
+        # Draw function for exponential periods with the given mean
+        return self.pool('exponential', scale).draw
+
+    def periods(self, spec):
+        # Draw function for the periods of a distribution of DISTRIBUTIONS (see distribution_key);
+        # the name is looked up once per distribution and parameters, and all draw functions
+        # of equal specs share one pool
+        key = distribution_key(spec)
+        if key not in self.pools:
+            block = DISTRIBUTIONS[key[0]]
+            params = dict(key[1:])
+            self.pools[key] = VariatePool(lambda size: block(self.rng, size, **params), self.block_size)
+        return self.pools[key].draw
+
+
+# Variates pre-drawn per node stream; a node only sees a few events per run
+NODE_BLOCK_SIZE = 16
+
+
+class InversionGenerator:
+    def __init__(self, rng, antithetic=False):
+        # Exponential variates by inversion of the uniforms U of rng, or of 1 - U for the
+        # antithetic partner of a run
+        self.rng = rng
+        self.antithetic = antithetic
+
+    def exponential(self, scale=1.0, size=None):
+        # Uniforms strictly inside (0, 1) on a grid symmetric around 1/2, so 1 - U is exact
+        u = (self.rng.integers(0, 2 ** 52, size) + 0.5) / 2 ** 52
+        if self.antithetic:
+            u = 1 - u
+        return -scale * np.log(u)
+
+
+class NodeStreams:
+    def __init__(self, seed_sequence, block_size=NODE_BLOCK_SIZE, antithetic=False):
+        # Common random numbers: node (i, j) draws its up periods and its repair periods from two
+        # streams of its own, derived from seed_sequence by the node's position. Runs given equal
+        # seed sequences then see the same periods at every node (scaled by lam and mu), whatever
+        # the lattice size, failure criterion or repair order; an antithetic run sees the
+        # periods of the complementary uniforms instead
+        self.seed_sequence = seed_sequence
+        self.block_size = block_size
+        self.antithetic = antithetic
+
+    def rng(self, i, j, kind):
+        sequence = np.random.SeedSequence(
+            self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key + (i, j, kind)
+        )
+        return InversionGenerator(np.random.default_rng(sequence), self.antithetic)
+
+    def draws(self, i, j, lam, mu):
+        # Draw functions of the up and the repair periods of node (i, j)
+        draw_up = Sampler(self.rng(i, j, 0), self.block_size).exponential(lam)
+        draw_down = Sampler(self.rng(i, j, 1), self.block_size).exponential(mu)
+        return draw_up, draw_down
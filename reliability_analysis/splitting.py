@@ -0,0 +1,149 @@
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from reliability_analysis import criteria
+from reliability_analysis.cut_sets import CutSetTracker
+from reliability_analysis.sampling import Sampler
+
+# Trajectories per level of a fixed-effort splitting run
+DEFAULT_EFFORT = 1000
+
+
+class LevelTracker(CutSetTracker):
+    def __init__(self, m, n, cut_sets):
+        # Cut-set counts plus the number of cut sets at every distance from failure (nodes of the
+        # set still up). The level of the lattice is the largest cut-set size minus the smallest
+        # distance: for r x s windows the most failed nodes in any window. The system is failed
+        # exactly at the top level, and one node event moves the level by at most one
+        super().__init__(m, n, cut_sets)
+        self.top = max(self.sizes)
+        self.reset()
+
+    def reset(self, down=()):
+        # All nodes up, then the flat nodes in down failed
+        self.counts = [0] * len(self.cut_sets)
+        self.down = [False] * (self.m * self.n)
+        self.distances = [0] * (self.top + 1)
+        for size in self.sizes:
+            self.distances[size] += 1
+        self.nearest = min(self.sizes)
+        self.failed_sets = 0
+        for k in down:
+            self.update(*divmod(k, self.n), False)
+        return self
+
+    def update(self, i, j, status):
+        k = i * self.n + j
+        if self.down[k] != status:
+            return
+        self.down[k] = not status
+        step = -1 if status else 1
+        counts = self.counts
+        distances = self.distances
+        for c in self.incidence[k]:
+            distance = self.sizes[c] - counts[c]
+            counts[c] += step
+            distances[distance] -= 1
+            distances[distance - step] += 1
+            if distance - step < self.nearest:
+                self.nearest = distance - step
+        while not distances[self.nearest]:
+            self.nearest += 1
+        self.failed_sets = distances[0]
+
+    def level(self):
+        return self.top - self.nearest
+
+
+def run_trajectory(state, target, end, lam, mu, tracker, sampler):
+    # Continue the lattice from state (time, failed flat nodes) until its level reaches target;
+    # returns (time, failed nodes) of that moment, or None once the run is over, and the number
+    # of events. Periods are exponential, so the pending events of a state need not be stored:
+    # every node draws a fresh residual period. Like simulate(), the first event after end is
+    # still processed
+    t, down = state
+    if t >= end:
+        return None, 0
+    tracker.reset(down)
+    draw_up = sampler.exponential(lam)
+    draw_down = sampler.exponential(mu)
+    up = [True] * (tracker.m * tracker.n)
+    for k in down:
+        up[k] = False
+    heap = [(t + (draw_up() if up[k] else draw_down()), k) for k in range(len(up))]
+    heapq.heapify(heap)
+    events = 0
+    while t < end:
+        t, k = heap[0]
+        events += 1
+        up[k] = not up[k]
+        tracker.update(*divmod(k, tracker.n), up[k])
+        if tracker.level() >= target:
+            return (t, tuple(node for node, status in enumerate(up) if not status)), events
+        heapq.heapreplace(heap, (t + (draw_up() if up[k] else draw_down()), k))
+    return None, events
+
+
+def estimate(m, n, r, s, end, lam, mu, rng=None, criterion=None, effort=DEFAULT_EFFORT, levels=None):
+    # One fixed-effort multilevel splitting estimate of the probability that a simulate() run
+    # sees the system fail and of its MTTF (TTF being end without failure). Every level gets
+    # effort trajectories, started evenly from the randomly ordered states in which the
+    # trajectories of the level below entered it; the failure probability is the product of the
+    # fractions reaching each next level, and the MTTF follows from the failure times of the
+    # last level weighted by the product of the earlier fractions. Both are unbiased
+    if criterion is None:
+        criterion = criteria.Windows(r, s)
+    rng = np.random.default_rng() if rng is None else rng
+    tracker = LevelTracker(m, n, criterion.cut_sets(m, n))
+    sampler = Sampler(rng)
+    if levels is None:
+        levels = range(1, tracker.top + 1)
+    else:
+        levels = sorted({level for level in levels if level < tracker.top} | {tracker.top})
+    states = [(0.0, ())]
+    weight = 1.0
+    events = 0
+    for target in levels:
+        order = rng.permutation(len(states))
+        hits = []
+        for e in range(effort):
+            hit, count = run_trajectory(states[order[e % len(states)]], target, end, lam, mu, tracker, sampler)
+            events += count
+            if hit is not None:
+                hits.append(hit)
+        if not hits:
+            return {'failure_probability': 0.0, 'MTTF': float(end), 'events': events}
+        if target == tracker.top:
+            overrun = sum(time - end for time, _ in hits) / effort
+            return {
+                'failure_probability': weight * len(hits) / effort,
+                'MTTF': end + weight * overrun,
+                'events': events,
+            }
+        weight *= len(hits) / effort
+        states = hits
+
+
+def run_estimate(task):
+    # One estimate from the arguments of estimate(), for the worker processes
+    return estimate(*task)
+
+
+def solve(m, n, r, s, end, lam, mu, rngs, criterion=None, effort=DEFAULT_EFFORT, levels=None, workers=1):
+    # Independent splitting estimates, one per generator of rngs, spread over workers processes;
+    # every estimate draws only from its own generator, so the results do not depend on workers.
+    # Returns the mean failure probability and MTTF with the standard errors of the means, and
+    # the events simulated
+    tasks = [(m, n, r, s, end, lam, mu, rng, criterion, effort, levels) for rng in rngs]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_estimate, tasks))
+    else:
+        results = [run_estimate(task) for task in tasks]
+    solution = {'runs': len(results), 'events': sum(result['events'] for result in results)}
+    for key in ('failure_probability', 'MTTF'):
+        values = np.array([result[key] for result in results])
+        solution[key] = float(values.mean())
+        solution[key + '_se'] = float(values.std(ddof=1) / math.sqrt(len(values))) if len(values) > 1 else math.inf
+    return solution
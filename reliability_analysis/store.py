@@ -0,0 +1,108 @@
+import json
+import os
+import numpy as np
+from reliability_analysis.accumulators import METRICS
+
+# Per-run columns and their on-disk types; every column is a raw little-endian file
+RUN_COLUMNS = {'batch': '<i4', 'run': '<i8'}
+RUN_COLUMNS.update({metric: '<f8' for metric in METRICS})
+# Runs buffered in memory before they are appended to the column files
+FLUSH_RUNS = 4096
+
+
+class ResultStore:
+    def __init__(self, path, flush_runs=FLUSH_RUNS):
+        # Append-only columnar store of per-run records in the directory path: one file per
+        # column (batch id, run index, the five metrics) and batches.json with the name,
+        # parameters and seed of every batch id. Columns are read back as memory maps, so a
+        # reader only touches the columns it asks for
+        self.path = path
+        self.flush_runs = flush_runs
+        os.makedirs(path, exist_ok=True)
+        self.batches_path = os.path.join(path, 'batches.json')
+        self.batches = []
+        if os.path.exists(self.batches_path):
+            with open(self.batches_path) as f:
+                self.batches = json.load(f)
+        self.buffer = {column: [] for column in RUN_COLUMNS}
+        self.buffered = 0
+        self.truncate()
+
+    def truncate(self):
+        # Cut every column, the batch ids included, to the runs all columns have, so appends
+        # after a flush cut short stay aligned
+        size = len(self)
+        for column, dtype in RUN_COLUMNS.items():
+            if self.stored(column) > size:
+                os.truncate(self.column_path(column), size * np.dtype(dtype).itemsize)
+
+    def add_batch(self, name, params, seed):
+        # Id of a new batch of runs; the seed is kept as a string since it may not fit 64 bits
+        self.batches.append({'name': name, 'params': params, 'seed': str(seed)})
+        with open(self.batches_path, 'w') as f:
+            json.dump(self.batches, f, indent=1)
+        return len(self.batches) - 1
+
+    def append(self, batch_id, start, results):
+        # Runs start, start + 1, ... of a batch, given as five metric lists
+        size = len(results[0])
+        self.buffer['batch'].extend([batch_id] * size)
+        self.buffer['run'].extend(range(start, start + size))
+        for metric, values in zip(METRICS, results):
+            self.buffer[metric].extend(values)
+        self.buffered += size
+        if self.buffered >= self.flush_runs:
+            self.flush()
+
+    def flush(self):
+        # Append the buffered runs to every column file
+        if not self.buffered:
+            return
+        for column, dtype in RUN_COLUMNS.items():
+            with open(self.column_path(column), 'ab') as f:
+                f.write(np.asarray(self.buffer[column], dtype=dtype).tobytes())
+            self.buffer[column] = []
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def column_path(self, column):
+        return os.path.join(self.path, column + '.bin')
+
+    def __len__(self):
+        # Runs on disk; a flush cut short leaves some columns longer, the common prefix counts
+        return min(self.stored(column) for column in RUN_COLUMNS)
+
+    def stored(self, column):
+        path = self.column_path(column)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // np.dtype(RUN_COLUMNS[column]).itemsize
+
+    def column(self, name):
+        # Read-only memory map of a run column, or the values of a batch parameter per run
+        # (name, seed or any key of the batch parameters, None where a batch lacks it)
+        size = len(self)
+        if name in RUN_COLUMNS:
+            if size == 0:
+                return np.zeros(0, dtype=RUN_COLUMNS[name])
+            return np.memmap(self.column_path(name), dtype=RUN_COLUMNS[name], mode='r', shape=(size,))
+        if name in ('name', 'seed'):
+            values = [batch[name] for batch in self.batches]
+        else:
+            values = [batch['params'].get(name) for batch in self.batches]
+        lookup = np.empty(len(values), dtype=object)
+        for b, value in enumerate(values):
+            lookup[b] = value
+        return lookup[self.column('batch')]
+
+    def read(self, columns):
+        # Columns by name, e.g. read(['smart', 'r', 'm', 'TTF'])
+        return {name: self.column(name) for name in columns}
@@ -0,0 +1,241 @@
+import csv
+import importlib
+import inspect
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from reliability_analysis import adaptive, parallel
+from reliability_analysis.accumulators import METRICS, make_run_stats
+
+# Columns of the results table after the batch name and the swept parameters
+RESULT_COLUMNS = ('runs', 'breakeven_profit', 'reliability', 'MTTF', 'MTBF', 'avg_r', 'avg_m')
+# Columns added for batches with common random numbers: the mean paired difference of every
+# per-run metric to the batch's first point and its confidence half-width
+DIFFERENCE_COLUMNS = tuple(column for metric in METRICS for column in (f'diff_{metric}', f'diff_{metric}_hw'))
+
+
+def range_values(spec):
+    # [start, stop] or [start, stop, step] like range(), floats allowed
+    if all(isinstance(value, int) for value in spec):
+        return list(range(*spec))
+    return np.arange(*spec).tolist()
+
+
+def expand(sweep):
+    # Parameter sets of a sweep section: the Cartesian product of its grid and range axes and of
+    # its zip groups (one mapping or a list of them), whose lists have equal lengths and are
+    # varied together
+    unknown = set(sweep) - {'grid', 'range', 'zip'}
+    if unknown:
+        raise ValueError(f"Unknown sweep sections {sorted(unknown)}, expected grid, range or zip")
+    axes = []
+    for key, values in sweep.get('grid', {}).items():
+        axes.append([{key: value} for value in values])
+    for key, spec in sweep.get('range', {}).items():
+        axes.append([{key: value} for value in range_values(spec)])
+    groups = sweep.get('zip', [])
+    for zipped in [groups] if isinstance(groups, dict) else groups:
+        if len({len(values) for values in zipped.values()}) != 1:
+            raise ValueError("Lists of a sweep's zip group must have the same length")
+        axes.append([dict(zip(zipped, values)) for values in zip(*zipped.values())])
+    points = []
+    for combination in itertools.product(*axes):
+        point = {}
+        for part in combination:
+            point.update(part)
+        points.append(point)
+    return points
+
+
+def plan(config):
+    # Points of every batch of a config: (batch name, parameters) with the batch's own parameters
+    # overridden by each parameter set of its sweep; a batch without sweep is one point
+    points = []
+    for batch_name, batch in config.items():
+        base = {key: value for key, value in batch.items() if key != 'sweep'}
+        for point in expand(batch.get('sweep', {})):
+            points.append((batch_name, dict(base, **point)))
+    return points
+
+
+def swept_keys(config):
+    # Parameters varied by any sweep of a config, in order of appearance
+    keys = {}
+    for batch in config.values():
+        for point in expand(batch.get('sweep', {})):
+            keys.update(dict.fromkeys(point))
+    return list(keys)
+
+
+def cost(params):
+    # Estimated cost of one run: lattice size times simulated time span
+    params = dict(parallel.SIMULATION_DEFAULTS, **params)
+    return params['m'] * params['n'] * params['end']
+
+
+def load_simulator(path):
+    # Simulate function given as 'package.module:function'
+    module_name, function_name = path.split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def run_task(task, profile=None):
+    # Runs [start, stop) of a point; simulate() unless the point names another simulator, which
+    # gets the point's parameters by name and its own random stream per run, or the per-node
+    # streams of the run with common random numbers or antithetic runs. A profiling.Profile is
+    # passed on to simulators that take one
+    seed, params, start, stop = task
+    if 'simulator' not in params:
+        return parallel.run_task(task, profile)
+    function = load_simulator(params['simulator'])
+    signature = inspect.signature(function)
+    kwargs = {key: value for key, value in params.items() if key in signature.parameters}
+    if profile is not None and 'profile' in signature.parameters:
+        kwargs['profile'] = profile
+    results = []
+    if parallel.uses_node_streams(params) and 'streams' not in signature.parameters:
+        raise ValueError(f"{params['simulator']} does not take per-node random streams (streams)")
+    for k in range(start, stop):
+        sequence = parallel.run_seed_sequence(seed, params, k)
+        if parallel.uses_node_streams(params):
+            kwargs['streams'] = parallel.node_streams(seed, params, k)
+        elif 'rng' in signature.parameters:
+            kwargs['rng'] = np.random.default_rng(sequence)
+        else:
+            # Simulators drawing from the global numpy state
+            np.random.seed(sequence.generate_state(4))
+        results.append(function(**kwargs))
+    return [list(metric) for metric in zip(*results)]
+
+
+def baselines(points):
+    # Index of the point every point with common random numbers is paired with: the first point
+    # of its batch; None without common random numbers
+    firsts = {}
+    paired = []
+    for p, (batch_name, params) in enumerate(points):
+        first = firsts.setdefault(batch_name, p)
+        if not params.get('crn'):
+            paired.append(None)
+            continue
+        if params['runs'] != points[first][1]['runs']:
+            raise ValueError(f"Points of batch {batch_name} need equal runs for common random numbers")
+        paired.append(first)
+    return paired
+
+
+def paired_difference(chunk, baseline_chunk):
+    return [[a - b for a, b in zip(metric, baseline)] for metric, baseline in zip(chunk, baseline_chunk)]
+
+
+def run(points, seed, workers=1, store=None):
+    # Simulate all points; yields (point index, RunStats, RunStats of the paired differences to
+    # the point's baseline or None) as soon as all runs of a point are in. Chunks of runs go to
+    # the workers largest first (by estimated cost), so long runs do not end up alone at the end
+    # of the sweep. Runs are appended to the store (a ResultStore) when given
+    paired = baselines(points)
+    if store is not None:
+        point_ids = [store.add_batch(batch_name, params, seed) for batch_name, params in points]
+    tasks = []
+    for p, (_, params) in enumerate(points):
+        for _, task in parallel.make_tasks({'point': params}, seed, {0: (0, params['runs'])}):
+            tasks.append((p, task))
+    tasks.sort(key=lambda task: -cost(points[task[0]][1]) * (task[1][3] - task[1][2]))
+    stats = [make_run_stats(params) for _, params in points]
+    differences = [None if b is None or b == p else make_run_stats(points[p][1]) for p, b in enumerate(paired)]
+    # Chunks that finished before an earlier chunk of their point; statistics take runs in order
+    pending = [{} for _ in points]
+    # Chunks of paired points kept until their difference is taken; baseline chunks for the
+    # whole sweep
+    kept = [{} for _ in points]
+    dependents = [[q for q, b in enumerate(paired) if b == p and q != p] for p in range(len(points))]
+
+    def complete(p):
+        runs = points[p][1]['runs']
+        return stats[p].count == runs and (differences[p] is None or differences[p].count == runs)
+
+    done = [complete(p) for p in range(len(points))]
+    for p in range(len(points)):
+        if done[p]:
+            yield p, stats[p], differences[p]
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if executor is not None:
+            futures = {executor.submit(run_task, task): (p, task[2]) for p, task in tasks}
+            completed = ((futures[future], future.result()) for future in as_completed(futures))
+        else:
+            completed = (((p, task[2]), run_task(task)) for p, task in tasks)
+        for (p, start), chunk in completed:
+            pending[p][start] = chunk
+            if store is not None:
+                store.append(point_ids[p], start, chunk)
+            while stats[p].count in pending[p]:
+                stats[p].extend(pending[p].pop(stats[p].count))
+            touched = [p]
+            if paired[p] is not None:
+                kept[p][start] = chunk
+                touched += dependents[p]
+            for q in touched:
+                if differences[q] is not None:
+                    b = paired[q]
+                    while differences[q].count in kept[q] and differences[q].count in kept[b]:
+                        first = differences[q].count
+                        differences[q].extend(paired_difference(kept[q].pop(first), kept[b][first]))
+                # A paired point is done once its differences are in as well
+                if not done[q] and complete(q):
+                    done[q] = True
+                    yield q, stats[q], differences[q]
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def table_row(batch_name, params, keys, stats, differences=None):
+    # One row of the results table, metrics reduced like main() prints them, with the paired
+    # differences to the batch's first point when given
+    downtime, MTTF, MTBF, avg_r, avg_m = stats.mean.tolist()
+    reliability = 1 - downtime
+    avg_r = round(avg_r, 6)
+    avg_m = round(avg_m, 6)
+    row = {'batch': batch_name}
+    row.update({key: params.get(key) for key in keys})
+    row.update({
+        'runs': stats.count,
+        'breakeven_profit': round((avg_r + avg_m) / (reliability * params['end']), 6),
+        'reliability': reliability,
+        'MTTF': MTTF,
+        'MTBF': MTBF,
+        'avg_r': avg_r,
+        'avg_m': avg_m,
+    })
+    if differences is not None:
+        intervals = adaptive.mean_intervals(differences, params.get('confidence', 0.95))
+        for metric, (mean, half_width) in intervals.items():
+            row[f'diff_{metric}'] = mean
+            row[f'diff_{metric}_hw'] = half_width
+    return row
+
+
+def run_sweeps(config, seed=None, workers=1, out=None, store=None):
+    # Simulate every point of a config and return its tidy results table, one row per point in
+    # plan order; rows are also written to the file out as CSV while the points finish, and the
+    # runs of every point to the store (a ResultStore) when given
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    points = plan(config)
+    keys = swept_keys(config)
+    columns = ['batch'] + keys + list(RESULT_COLUMNS)
+    if any(batch.get('crn') for batch in config.values()):
+        columns += DIFFERENCE_COLUMNS
+    writer = None
+    if out is not None:
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+    rows = [None] * len(points)
+    for p, stats, differences in run(points, seed, workers, store):
+        batch_name, params = points[p]
+        rows[p] = table_row(batch_name, params, keys, stats, differences)
+        if writer is not None:
+            writer.writerow(rows[p])
+            out.flush()
+    return rows
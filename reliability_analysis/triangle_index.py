@@ -0,0 +1,41 @@
+from reliability_analysis.cut_sets import CutSetTracker
+
+
+def triangular_adjacency(m, n):
+    # Neighbours of every node k = i * n + j of the triangular lattice wrapping around both edges:
+    # the four grid neighbours and the diagonal ones at (i - 1, j - 1) and (i + 1, j + 1)
+    adjacency = []
+    for i in range(m):
+        for j in range(n):
+            neighbours = {
+                ((i + x) % m) * n + (j + y) % n
+                for x, y in ((-1, -1), (-1, 0), (0, -1), (0, 1), (1, 1), (1, 0))
+            }
+            neighbours.discard(i * n + j)
+            adjacency.append(sorted(neighbours))
+    return adjacency
+
+
+def find_triangles(adjacency):
+    # Every triple of mutually connected nodes, as sorted tuples
+    neighbours = [set(nodes) for nodes in adjacency]
+    triangles = []
+    for a, nodes in enumerate(adjacency):
+        for b in nodes:
+            if b <= a:
+                continue
+            for c in nodes:
+                if c > b and c in neighbours[b]:
+                    triangles.append((a, b, c))
+    return triangles
+
+
+class TriangleIndex(CutSetTracker):
+    def __init__(self, m, n, adjacency=None):
+        # Keeps the number of failed nodes of every triangle so that one node event only
+        # touches the triangles through that node
+        if adjacency is None:
+            adjacency = triangular_adjacency(m, n)
+        super().__init__(m, n, find_triangles(adjacency))
+        self.triangles = self.cut_sets
+        self.node_triangles = self.incidence
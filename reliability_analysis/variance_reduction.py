@@ -0,0 +1,82 @@
+import math
+import numpy as np
+from reliability_analysis.accumulators import METRICS
+
+# Per-run metrics whose expectations are known in closed form and serve as control variates
+CONTROLS = ('repair_costs', 'maintenance_costs')
+
+
+def expected_costs(m, n, end, lam, mu):
+    # Expected repair and maintenance costs of a simulate() run. Every node alternates between
+    # exponential up (mean lam) and repair (mean mu) periods whatever the rest of the lattice
+    # does, so the costs follow from the two-state chain of one node: failures and repairs up to
+    # end, plus the first event after end, which the event loop processes as well
+    from scipy import stats
+
+    cr = 0.5
+    cm = 0.25
+    a = 1 / lam
+    b = 1 / mu
+    c = a + b
+    nodes = m * n
+    decay = math.exp(-c * end)
+    # Expected failures, repairs and sum of repair times of one node in [0, end)
+    failures = a * (b * end / c + a / c ** 2 * (1 - decay))
+    repairs = a * b / c * (end - (1 - decay) / c)
+    repair_times = a * b / c * (end ** 2 / 2 - (1 - decay * (1 + c * end)) / c ** 2)
+    # The event after end: with u nodes up it is a failure with probability u a / (u a + d b),
+    # otherwise a repair at end plus the residual time, which schedules a failure lam later
+    up = np.arange(nodes + 1)
+    weights = stats.binom.pmf(up, nodes, b / c + a / c * decay)
+    rate = up * a + (nodes - up) * b
+    last_failure = np.sum(weights * up * a / rate)
+    last_repair = np.sum(weights * (nodes - up) * b / rate * (end + lam + 1 / rate))
+    repair_costs = cr * (nodes * failures + last_failure)
+    # Maintenance costs cm times every planned failure time: the initial ones and one per repair
+    maintenance_costs = cm * (nodes * lam + nodes * (repair_times + repairs * lam) + last_repair)
+    return float(repair_costs), float(maintenance_costs)
+
+
+def control_variates(run_stats, expected):
+    # Control-variate estimate of the mean of every metric and the factor by which it reduces
+    # the variance of the plain mean: the costs are regressed out of every metric with the
+    # coefficients of the sample covariance; the costs themselves get their expectations
+    run_stats = run_stats.independent()
+    controls = [METRICS.index(metric) for metric in CONTROLS]
+    covariance = run_stats.covariance()
+    gap = run_stats.mean[controls] - np.asarray(expected)
+    inverse = np.linalg.pinv(covariance[np.ix_(controls, controls)])
+    estimates = {}
+    for k, metric in enumerate(METRICS):
+        if k in controls:
+            estimates[metric] = (expected[controls.index(k)], math.inf)
+            continue
+        coefficients = covariance[k, controls] @ inverse
+        residual = covariance[k, k] - coefficients @ covariance[controls, k]
+        if covariance[k, k] == 0:
+            factor = 1.0
+        else:
+            factor = covariance[k, k] / residual if residual > 0 else math.inf
+        estimates[metric] = (run_stats.mean[k] - coefficients @ gap, factor)
+    return estimates
+
+
+def estimates(batch, run_stats):
+    # Means of a batch's runs (simulation parameters complete) with the variance reductions it
+    # asks for (antithetic: true, control_variates: true) and the effective variance reduction
+    # factor of every metric: the variance of the plain mean of as many independent runs over
+    # that of the estimate
+    independent = run_stats.independent()
+    # Antithetic pairs: variance of single runs over twice that of the pair means
+    plain = np.diag(run_stats.covariance()) / run_stats.count
+    paired = np.diag(independent.covariance()) / independent.count
+    antithetic = [p / q if q > 0 else 1.0 for p, q in zip(plain.tolist(), paired.tolist())]
+    if batch.get('control_variates'):
+        expected = expected_costs(batch['m'], batch['n'], batch['end'], batch['lam'], batch['mu'])
+        reduced = control_variates(run_stats, expected)
+    else:
+        reduced = {metric: (run_stats.mean[k], 1.0) for k, metric in enumerate(METRICS)}
+    return {
+        metric: (estimate, factor * antithetic[k])
+        for k, (metric, (estimate, factor)) in enumerate(reduced.items())
+    }
@@ -0,0 +1,48 @@
+from reliability_analysis.bitset import BitsetTracker
+from reliability_analysis.cut_sets import CutSetTracker
+
+# Largest number of (window, node) incidences kept by a WindowTracker; larger lattices and
+# windows use a BitsetTracker, which keeps one int per row
+MAX_WINDOW_CELLS = 10 ** 6
+
+
+def window_cells(m, n, r, s, wrap=True):
+    # Flat nodes of every r x s window. Window starts: every node when wrapping around the
+    # lattice, otherwise only the starts whose window fits inside the lattice
+    if wrap:
+        rows = range(m)
+        cols = range(n)
+    else:
+        rows = range(m - r + 1)
+        cols = range(n - s + 1)
+    windows = []
+    for i in rows:
+        for j in cols:
+            # A window is failed once all its distinct nodes are down (windows larger
+            # than a wrapped lattice visit some nodes twice)
+            cells = {((i + x) % m) * n + (j + y) % n for x in range(r) for y in range(s)}
+            windows.append(sorted(cells))
+    return windows
+
+
+class WindowTracker(CutSetTracker):
+    def __init__(self, m, n, r, s, wrap=True):
+        # Keeps the number of failed nodes in every r x s window so that one node event
+        # only touches the r * s windows containing that node
+        super().__init__(m, n, window_cells(m, n, r, s, wrap))
+        self.r = r
+        self.s = s
+        self.wrap = wrap
+        self.windows = self.cut_sets
+
+    @classmethod
+    def from_lattice(cls, r, s, lattice, wrap=True):
+        # Build a tracker matching an existing lattice of Node objects
+        return cls(len(lattice), len(lattice[0]), r, s, wrap).load(lattice)
+
+
+def make_tracker(m, n, r, s, wrap=True):
+    # Window counts are the cheapest per event, but need m * n * r * s incidences
+    if m * n * r * s > MAX_WINDOW_CELLS:
+        return BitsetTracker(m, n, r, s, wrap)
+    return WindowTracker(m, n, r, s, wrap)
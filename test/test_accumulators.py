@@ -0,0 +1,25 @@
+import numpy as np
+from reliability_analysis.accumulators import RunningStats, RunStats
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).exponential(10, 20000)
+    stats = RunningStats(quantiles=(0.05, 0.5, 0.95))
+    for value in values:
+        stats.add(value)
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, values.mean())
+    assert np.isclose(stats.variance(), values.var(ddof=1))
+    assert (stats.min, stats.max) == (values.min(), values.max())
+    for p in (0.05, 0.5, 0.95):
+        assert abs(stats.quantile(p) - np.quantile(values, p)) < 0.02 * values.std()
+
+
+def test_run_stats_covariance():
+    rng = np.random.default_rng(1)
+    results = [rng.uniform(0, 0.5, 500), rng.exponential(10, 500), rng.exponential(8, 500), rng.normal(12, 2, 500), rng.normal(200, 10, 500)]
+    stats = RunStats(quantiles=(0.5,))
+    stats.extend(results)
+    assert np.allclose(stats.mean, [metric.mean() for metric in results])
+    assert np.allclose(stats.covariance(), np.cov(results))
+    assert abs(stats.quantile('TTF', 0.5) - np.median(results[1])) < 1
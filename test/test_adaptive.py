@@ -0,0 +1,39 @@
+import numpy as np
+from reliability_analysis import adaptive
+from reliability_analysis.parallel import run_batches
+from reliability_analysis.accumulators import RunStats
+
+
+def run_stats(results):
+    stats = RunStats()
+    stats.extend(results)
+    return stats
+
+
+def test_intervals_shrink_with_runs():
+    rng = np.random.default_rng(0)
+    results = [rng.uniform(0, 0.5, 400), rng.exponential(10, 400), rng.exponential(8, 400), rng.normal(12, 2, 400), rng.normal(200, 10, 400)]
+    wide = adaptive.intervals(run_stats([metric[:100] for metric in results]), 50)
+    narrow = adaptive.intervals(run_stats(results), 50)
+    for metric in adaptive.METRICS:
+        assert narrow[metric][1] < wide[metric][1]
+    breakeven_profit = (results[3].mean() + results[4].mean()) / (50 * (1 - results[0].mean()))
+    assert np.isclose(narrow['breakeven_profit'][0], breakeven_profit)
+
+
+def test_next_runs_stops_at_target_or_maximum():
+    batch = {'end': 50, 'target_rel_width': 0.05, 'max_runs': 300}
+    constant = [[0.2] * 50, [10.0] * 50, [8.0] * 50, [12.0] * 50, [200.0] * 50]
+    assert adaptive.next_runs(batch, run_stats(constant), 25) == 0
+    rng = np.random.default_rng(1)
+    noisy = run_stats([rng.uniform(0, 0.5, 250), rng.exponential(10, 250), rng.exponential(8, 250), rng.normal(12, 2, 250), rng.normal(200, 10, 250)])
+    assert adaptive.next_runs(batch, noisy, 25) == 50
+    assert adaptive.next_runs(dict(batch, target_rel_width={'reliability': 0.5}), noisy, 25) == 0
+
+
+def test_adaptive_batch_reaches_target():
+    config = {'batch_adaptive': {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 50, 'target_rel_width': {'reliability': 0.03}, 'max_runs': 5000}}
+    results = run_batches(config, 7)[0]
+    estimate, half_width = adaptive.intervals(results, 20)['reliability']
+    assert 50 < results.count < 5000
+    assert half_width <= 0.03 * estimate
@@ -0,0 +1,24 @@
+import numpy as np
+import reliability_analysis.reliability_analysis as ra
+from reliability_analysis.batch_engine import simulate_batch
+
+
+def test_batch_without_failures():
+    downtime, TTF, MTBF, repair_costs, maintenance_costs = simulate_batch(3, 3, 2, 2, 50, 1e9, 1, 20, np.random.default_rng(0))
+    assert np.all(downtime == 0)
+    assert np.all(TTF == 50)
+    assert np.all(MTBF == 50)
+    # Like simulate(), the first event past end (here a node failure) is still processed
+    assert np.all(repair_costs == 0.5)
+    assert np.all(maintenance_costs > 0)
+
+
+def test_batch_matches_simulate():
+    np.random.seed(0)
+    runs = 1000
+    batch = simulate_batch(3, 3, 2, 2, 50, 10, 10, runs, np.random.default_rng(0))
+    single = list(zip(*[ra.simulate(3, 3, 2, 2, 50, 10, 10) for _ in range(runs)]))
+    for batch_metric, single_metric in zip(batch, single):
+        assert len(batch_metric) == runs
+        error = np.std(single_metric) * np.sqrt(2 / runs)
+        assert abs(np.mean(batch_metric) - np.mean(single_metric)) < 4 * error
@@ -0,0 +1,30 @@
+import numpy as np
+from reliability_analysis import bitset
+from reliability_analysis.bitset import BitsetTracker
+from reliability_analysis.window_tracker import WindowTracker
+
+
+def test_tracker_matches_window_counts():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        m, n = rng.integers(1, 8, 2)
+        r, s = rng.integers(1, 10, 2)
+        wrap = bool(rng.integers(2))
+        counts = WindowTracker(m, n, r, s, wrap)
+        bits = BitsetTracker(m, n, r, s, wrap)
+        for _ in range(100):
+            i, j = rng.integers(m), rng.integers(n)
+            status = bool(rng.random() < 0.5)
+            counts.update(i, j, status)
+            bits.update(i, j, status)
+            assert bits.check_system() == counts.check_system()
+            assert bits.failed() == bitset.failed(bits.rows, n, r, s, wrap)
+
+
+def test_runs_wrap_around_row_end():
+    # Nodes 4, 0 and 1 of a 5-node row are down
+    row = 0b10011
+    assert bitset.run_starts(row, 5, 3) == 1 << 4
+    assert bitset.run_starts(row, 5, 3, wrap=False) == 0
+    assert bitset.window_starts([row, 0, row], 2) == [0, 0, row]
+    assert bitset.window_starts([row, 0, row], 2, wrap=False) == [0, 0]
@@ -0,0 +1,27 @@
+from reliability_analysis import parallel
+import os
+from reliability_analysis.cache import ResultCache, source_paths
+
+
+def test_cached_runs_are_reused(tmp_path, monkeypatch):
+    config = {'batch': {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 40}}
+    uncached = parallel.run_batches(config, 7)
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    assert parallel.run_batches(config, 7, cache=cache)[0].summary() == uncached[0].summary()
+    # A second request with more runs only simulates the new ones
+    tasks = []
+    run_task = parallel.run_task
+    monkeypatch.setattr(parallel, 'run_task', lambda task: tasks.append(task) or run_task(task))
+    config['batch']['runs'] = 60
+    results = parallel.run_batches(config, 7, cache=cache)
+    assert [(start, stop) for _, _, start, stop in tasks] == [(40, 50), (50, 60)]
+    assert results[0].summary() == parallel.run_batches(config, 7)[0].summary()
+    cache.close()
+
+
+def test_code_hash_covers_extensions():
+    # Batches can run an extension's simulate, so its source is part of the cache key
+    paths = [os.path.relpath(path, os.path.dirname(parallel.__file__)) for path in source_paths()]
+    assert 'parallel.py' in paths
+    assert os.path.join('extensions', 'batch_repairs.py') in paths
+    assert os.path.join('extensions', 'diffSpan', 'diffspan.py') in paths
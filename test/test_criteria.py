@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import reliability_analysis.reliability_analysis as ra
+from reliability_analysis import criteria, markov
+from reliability_analysis.parallel import run_batches
+
+
+class FixedNode:
+    def __init__(self, status):
+        self.status = status
+
+    def getStatus(self):
+        return self.status
+
+
+def test_trackers_match_cut_set_scan():
+    rng = np.random.default_rng(0)
+    m, n = 5, 6
+    for criterion in [
+        criteria.Windows(2, 3),
+        criteria.Windows(2, 2, wrap=False),
+        criteria.Triangles(),
+        criteria.CutSets([[(0, 0), (4, 5)], [(1, 1), (2, 2), (3, 3)]]),
+    ]:
+        cut_sets = criterion.cut_sets(m, n)
+        tracker = criterion.tracker(m, n)
+        status = np.ones(m * n, dtype=bool)
+        for _ in range(300):
+            k = rng.integers(m * n)
+            status[k] = not status[k]
+            tracker.update(*divmod(k, n), bool(status[k]))
+            failed = any(not status[list(cells)].any() for cells in cut_sets)
+            assert tracker.check_system() == (0 if failed else 1)
+            lattice = [[FixedNode(bool(x)) for x in row] for row in status.reshape(m, n).tolist()]
+            assert criterion.check_system(lattice) == tracker.check_system()
+
+
+def test_criterion_from_config():
+    criterion = criteria.from_config({'type': 'windows', 'r': 3, 's': 1, 'wrap': False})
+    assert criterion.cut_sets(3, 2) == [[0, 2, 4], [1, 3, 5]]
+    assert criteria.from_config({'type': 'cut_sets', 'cut_sets': [[[0, 0], [0, 1]]]}).cut_sets(2, 2) == [[0, 1]]
+    with pytest.raises(ValueError):
+        criteria.from_config({'type': 'stars'})
+
+
+def test_simulators_take_a_criterion():
+    # A single-node cut set fails the system exactly while node (0, 0) is down
+    criterion = criteria.CutSets([[(0, 0)]])
+    np.random.seed(0)
+    downtime = np.mean([ra.simulate(3, 3, 2, 2, 200, 10, 10, criterion=criterion)[0] for _ in range(200)])
+    exact = markov.solve(3, 3, 2, 2, 200, 10, 10, criterion=criterion)['downtime']
+    assert abs(downtime - exact) < 0.03
+    config = {'batch': {'extension_modules': [], 'engine': 'batch', 'lam': 10, 'mu': 10, 'end': 200, 'runs': 200, 'criterion': {'type': 'cut_sets', 'cut_sets': [[[0, 0]]]}}}
+    assert abs(run_batches(config, 1)[0].mean[0] - exact) < 0.03
+
+
+def test_criteria_without_cut_sets_cannot_be_created():
+    class Incomplete(criteria.Criterion):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
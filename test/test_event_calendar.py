@@ -0,0 +1,37 @@
+import pytest
+from reliability_analysis.event_calendar import EventCalendar
+
+
+def test_events_come_out_in_time_order():
+    calendar = EventCalendar()
+    for event in [(3.0, True, 0), (1.0, False, 1), (2.0, True, 2)]:
+        calendar.put(event)
+    assert [calendar.get() for _ in range(3)] == [(1.0, False, 1), (2.0, True, 2), (3.0, True, 0)]
+    assert calendar.empty()
+    with pytest.raises(IndexError):
+        calendar.get()
+
+
+def test_cancel_and_reschedule():
+    calendar = EventCalendar()
+    calendar.put((1.0, True, (0, 0)))
+    calendar.put((2.0, True, (0, 1)))
+    calendar.put((3.0, False, (1, 1)))
+    calendar.cancel((0, 0))
+    calendar.reschedule((1, 1), 0.5)
+    # A new event for a node replaces its pending one
+    calendar.put((4.0, False, (0, 1)))
+    assert len(calendar) == 2
+    assert calendar.scheduled((0, 0)) is None
+    assert calendar.get() == (0.5, False, (1, 1))
+    assert calendar.get() == (4.0, False, (0, 1))
+    assert calendar.empty()
+
+
+def test_dead_entries_are_dropped():
+    calendar = EventCalendar()
+    for step in range(1000):
+        calendar.put((float(step), True, step % 10))
+    assert len(calendar) == 10
+    assert len(calendar.heap) <= 2 * 10 + 65
+    assert [calendar.get()[0] for _ in range(10)] == [float(step) for step in range(990, 1000)]
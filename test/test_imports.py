@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+# Packages worker processes should not pay for: plotting, tables, scipy and config parsing are
+# imported where they are used
+HEAVY = ('matplotlib', 'pandas', 'scipy', 'tkinter', 'yaml')
+
+
+def imported_packages(statement):
+    script = f"import sys; {statement}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_core_imports_no_heavy_packages():
+    imported = imported_packages(
+        "import reliability_analysis.reliability_analysis, reliability_analysis.parallel, reliability_analysis.sweep"
+    )
+    assert imported.isdisjoint(HEAVY)
+
+
+def test_extension_simulators_import_without_plotting():
+    imported = imported_packages(
+        "import reliability_analysis.extensions.queuing_discipline.queuing_discipline, "
+        "reliability_analysis.extensions.diffSpan.diffspan, reliability_analysis.extensions.batch_repairs"
+    )
+    assert imported.isdisjoint(('matplotlib', 'pandas', 'tkinter'))
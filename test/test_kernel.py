@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+import reliability_analysis.reliability_analysis as ra
+from reliability_analysis import criteria, kernel
+
+
+def test_kernel_matches_simulate():
+    for args in [(3, 3, 2, 2, 50, 10, 10), (3, 3, 2, 2, 300, 10, 5), (5, 6, 2, 3, 100, 7, 3)]:
+        for criterion in [None, criteria.Triangles()]:
+            expected = ra.simulate(*args, np.random.default_rng(5), criterion)
+            # The uncompiled kernel follows the same random stream through the refilled pools
+            assert kernel.simulate_kernel(*args, np.random.default_rng(5), criterion) == expected
+            assert np.allclose(kernel.simulate(*args, np.random.default_rng(5), criterion), expected)
+
+
+def test_compiled_kernel_matches_uncompiled():
+    pytest.importorskip('numba')
+    for args in [(3, 3, 2, 2, 50, 10, 10), (5, 6, 2, 3, 100, 7, 3)]:
+        for criterion in [None, criteria.Triangles()]:
+            uncompiled = kernel.simulate_kernel(*args, np.random.default_rng(5), criterion)
+            compiled = kernel.simulate_kernel(*args, np.random.default_rng(5), criterion, kernel.compiled_events)
+            assert np.allclose(compiled, uncompiled)
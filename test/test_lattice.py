@@ -0,0 +1,27 @@
+import numpy as np
+import reliability_analysis.reliability_analysis as ra
+from reliability_analysis.lattice import LatticeState
+from reliability_analysis.window_tracker import WindowTracker
+
+
+def test_node_views_follow_state_arrays():
+    lattice = LatticeState(3, 4, 10, 2, np.random.default_rng(0))
+    assert len(lattice) == 3 and len(lattice[0]) == 4
+    next_event = lattice.update(6, False, 1.5)
+    assert lattice.status[1, 2] == False
+    assert lattice[1][2].getStatus() is False
+    assert lattice[1][2].getNext() == next_event > 1.5
+    lattice[1][3].update(False, 1.0)
+    assert lattice.status_flat[7] == False
+
+
+def test_check_system_on_lattice_state():
+    rng = np.random.default_rng(3)
+    lattice = LatticeState(5, 5, 10, 10, rng)
+    tracker = WindowTracker(5, 5, 2, 2)
+    for _ in range(200):
+        k = int(rng.integers(25))
+        status = not lattice.status_flat[k]
+        lattice.update(k, status, 0)
+        tracker.update(*divmod(k, 5), status)
+        assert ra.check_system(2, 2, lattice) == tracker.check_system()
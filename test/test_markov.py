@@ -0,0 +1,27 @@
+import numpy as np
+from reliability_analysis import markov
+from reliability_analysis.batch_engine import simulate_batch
+
+
+def test_failed_states_follow_windows():
+    failed = markov.failed_states(3, 3, 2, 2)
+    assert not failed[0]
+    # Nodes 0, 1, 3 and 4 form the window starting at (0, 0)
+    assert failed[0b11011]
+    assert not failed[0b01011]
+    assert failed[-1] and not failed.all()
+
+
+def test_generator_rows_sum_to_zero():
+    Q = markov.generator_matrix(2, 3, 10, 5)
+    assert np.allclose(Q.sum(axis=1), 0)
+    assert Q[0, 1] == 1 / 10 and Q[1, 0] == 1 / 5
+
+
+def test_solve_matches_simulation():
+    runs = 20000
+    metrics = markov.solve(3, 3, 2, 2, 50, 10, 10)
+    downtime, TTF, _, repair_costs, maintenance_costs = simulate_batch(3, 3, 2, 2, 50, 10, 10, runs, np.random.default_rng(0))
+    for simulated, exact in [(1 - downtime, metrics['reliability']), (TTF, metrics['MTTF']), (repair_costs, metrics['avg_r']), (maintenance_costs, metrics['avg_m'])]:
+        assert abs(simulated.mean() - exact) < 4 * simulated.std() / np.sqrt(runs)
+    assert metrics['MTTF'] < metrics['MTTF_unbounded']
@@ -0,0 +1,37 @@
+import time
+import pytest
+from reliability_analysis.parallel import run_batches, run_task
+from reliability_analysis.profiling import Profile
+
+
+def test_results_do_not_depend_on_workers():
+    config = {
+        'batch_event': {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 60},
+        'batch_vectorized': {'extension_modules': [], 'engine': 'batch', 'lam': 10, 'mu': 5, 'end': 20, 'runs': 30},
+        # Blocks of the batch engine split across the workers
+        'batch_blocks': {'extension_modules': [], 'engine': 'batch', 'batch_block': 8, 'lam': 10, 'mu': 5, 'end': 20, 'runs': 30},
+    }
+    serial = run_batches(config, 42, workers=1)
+    parallel = run_batches(config, 42, workers=2)
+    assert [stats.summary() for stats in serial] == [stats.summary() for stats in parallel]
+    assert serial[0].count == 60 and serial[2].count == 30
+    assert run_batches(config, 43, workers=1)[0].summary() != serial[0].summary()
+
+
+def test_batch_engine_vectorizes_whole_blocks():
+    seconds = {}
+    for engine in ('event', 'batch'):
+        config = {engine: {'extension_modules': [], 'engine': engine, 'lam': 10, 'mu': 10, 'end': 50, 'runs': 10000}}
+        started = time.perf_counter()
+        assert run_batches(config, 42)[0].count == 10000
+        seconds[engine] = time.perf_counter() - started
+    assert seconds['batch'] < seconds['event'] / 4
+
+
+@pytest.mark.parametrize('engine', ['kernel', 'batch'])
+def test_metrics_and_profiles_need_the_event_engine(engine):
+    batch = {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 4, 'engine': engine}
+    with pytest.raises(ValueError):
+        run_task((1, dict(batch, metrics=['TTF']), 0, 4))
+    with pytest.raises(ValueError):
+        run_task((1, batch, 0, 4), Profile())
@@ -0,0 +1,58 @@
+import pytest
+from reliability_analysis import parallel
+from reliability_analysis.plugins import REGISTRY, PluginRegistry
+
+
+def make_extensions(tmp_path, monkeypatch):
+    # A package name of its own per test, since imported packages stay in sys.modules
+    name = 'extensions_' + tmp_path.name
+    package = tmp_path / name
+    (package / 'nested').mkdir(parents=True)
+    (package / 'nested' / 'nested.py').write_text(
+        "print('loading nested')\n"
+        "from reliability_analysis.reliability_analysis import Node\n"
+        "def check_system(r, s, lattice):\n    return 1\n"
+    )
+    (package / 'flat.py').write_text(
+        "def simulate(m, n, end, lam):\n    return 0.0, float(end), float(end), 1.0, float(lam)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return PluginRegistry(str(package), name)
+
+
+def test_extensions_are_found_and_imported_once(tmp_path, monkeypatch, capsys):
+    registry = make_extensions(tmp_path, monkeypatch)
+    assert registry.names() == ['flat', 'nested']
+    first = registry.load('nested')
+    assert registry.load('nested') is first
+    assert capsys.readouterr().out == 'loading nested\n'
+    with pytest.raises(ValueError):
+        registry.load('missing')
+
+
+def test_overrides_are_the_extensions_own_definitions(tmp_path, monkeypatch):
+    registry = make_extensions(tmp_path, monkeypatch)
+    # nested imports Node without overriding it
+    assert set(registry.overrides(['nested'])) == {'check_system'}
+    assert set(registry.overrides(['nested', 'flat'])) == {'check_system', 'simulate'}
+    assert registry.override([], 'simulate') is None
+    assert set(REGISTRY.overrides(['template_extension'])) == {'Node'}
+
+
+def test_batches_run_an_extensions_simulate(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, 'REGISTRY', make_extensions(tmp_path, monkeypatch))
+    config = {'batch': {'extension_modules': ['flat'], 'lam': 4, 'mu': 10, 'end': 20, 'runs': 30}}
+    stats = parallel.run_batches(config, 5)[0]
+    assert stats.count == 30
+    assert stats.mean.tolist() == [0.0, 20.0, 20.0, 1.0, 4.0]
+
+
+def test_overrides_without_simulate_are_reported(tmp_path, monkeypatch, recwarn):
+    registry = make_extensions(tmp_path, monkeypatch)
+    assert registry.simulator([]) is None
+    assert registry.simulator(['nested', 'flat']) is registry.load('flat').simulate
+    assert not recwarn
+    with pytest.warns(UserWarning, match='check_system'):
+        assert registry.simulator(['nested']) is None
+    with pytest.warns(UserWarning, match='Node'):
+        REGISTRY.simulator(['template_extension'])
@@ -0,0 +1,34 @@
+import numpy as np
+from reliability_analysis.profiling import PHASES, Profile, profile_runs
+from reliability_analysis.reliability_analysis import simulate
+from reliability_analysis.extensions.diff_distribution.diff_distribution import simulate as simulate_distribution
+
+
+def test_profiled_runs_give_the_same_results():
+    profile = Profile()
+    plain = simulate(4, 4, 2, 2, 100, 5, 5, np.random.default_rng(3))
+    profiled = simulate(4, 4, 2, 2, 100, 5, 5, np.random.default_rng(3), profile=profile)
+    assert profiled == plain
+    summary = profile.summary()
+    assert summary['runs'] == 1
+    assert summary['events'] == summary['checks'] > 0
+    assert summary['transitions'] > 0
+    assert abs(sum(summary['shares'].values()) - 1) < 0.05
+    assert set(summary['shares']) == set(PHASES)
+
+
+def test_profiles_add_up_over_runs_and_extensions():
+    profile = Profile()
+    for seed in range(3):
+        np.random.seed(seed)
+        simulate_distribution(4, 4, 2, 2, 50, 5, 5, profile=profile)
+    assert profile.runs == 3 and profile.events == profile.checks > 0
+    total = Profile().merge(profile).merge(profile)
+    assert total.runs == 6 and total.events == 2 * profile.events
+
+
+def test_batch_profile_replays_its_first_runs():
+    batch = {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 30, 'engine': 'kernel'}
+    profile = profile_runs(batch, 5, runs=4)
+    assert profile.runs == 4 and profile.events > 0
+    assert 'events/s' in profile.format()
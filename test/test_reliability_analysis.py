@@ -1,5 +1,35 @@
+import math
+import numpy as np
+import pytest
+import yaml
 import reliability_analysis.reliability_analysis as ra
 
 
 def test_main():
     assert ra.main() == 0
+
+
+def test_requested_metrics_match_full_runs():
+    full = ra.simulate(6, 6, 2, 2, 50, 5, 2, np.random.default_rng(4))
+    ttf = ra.simulate(6, 6, 2, 2, 50, 5, 2, np.random.default_rng(4), metrics=['TTF'])
+    assert ttf[1] == full[1]
+    assert all(math.isnan(value) for k, value in enumerate(ttf) if k != 1)
+    costs = ra.simulate(6, 6, 2, 2, 50, 5, 2, np.random.default_rng(4), metrics=['repair_costs', 'maintenance_costs'])
+    assert costs[3:] == full[3:]
+    with pytest.raises(ValueError):
+        ra.simulate(3, 3, 2, 2, 10, 5, 2, metrics=['uptime'])
+
+
+def test_markov_batches_use_their_lattice(tmp_path, capsys):
+    batch = {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 50, 'm': 2, 'n': 2, 'r': 1, 's': 1}
+    config = tmp_path / 'config.yaml'
+    config.write_text(yaml.safe_dump({
+        'exact': dict(batch, solver='markov'),
+        'simulated': dict(batch, runs=4000),
+    }))
+    assert ra.main(['--config', str(config), '--seed', '3']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    # Reliability is the second value printed after each batch header
+    exact, simulated = (float(lines[k + 2]) for k, line in enumerate(lines) if line.startswith('Simulated Batch'))
+    assert abs(exact - simulated) < 0.02
+    assert exact < 0.2
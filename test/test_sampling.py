@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+from reliability_analysis.sampling import NodeStreams, Sampler, VariatePool
+
+
+def test_pool_refills_with_growing_blocks():
+    sizes = []
+
+    def draw_block(size):
+        sizes.append(size)
+        return np.arange(size, dtype=float)
+
+    pool = VariatePool(draw_block, block_size=256)
+    values = [pool.draw() for _ in range(64 + 128 + 256 + 10)]
+    assert sizes == [64, 128, 256, 256]
+    assert values[:3] == [0.0, 1.0, 2.0] and values[64] == 0.0
+
+
+def test_pooled_draws_match_scalar_sampling():
+    sampler = Sampler(np.random.default_rng(0))
+    draw = sampler.exponential(10)
+    pooled = np.array([draw() for _ in range(20000)])
+    scalar = np.random.default_rng(1).exponential(10, size=20000)
+    assert abs(pooled.mean() - 10) < 0.3
+    assert abs(pooled.std() - scalar.std()) < 0.4
+    # Same quantiles up to sampling noise
+    assert np.all(np.abs(np.quantile(pooled, [0.1, 0.5, 0.9]) - np.quantile(scalar, [0.1, 0.5, 0.9])) < 0.5)
+    assert sampler.exponential(10).__self__ is draw.__self__
+
+
+def test_node_streams_are_common_across_parameters():
+    streams = NodeStreams(np.random.SeedSequence(5, spawn_key=(0,)))
+    other = NodeStreams(np.random.SeedSequence(5, spawn_key=(0,)))
+    draw_up, draw_down = streams.draws(1, 2, 10, 2)
+    other_up, other_down = other.draws(1, 2, 5, 2)
+    up = [draw_up() for _ in range(40)]
+    # The same variates, scaled by the mean period
+    assert np.allclose(up, [2 * other_up() for _ in range(40)])
+    assert [draw_down() for _ in range(5)] == [other_down() for _ in range(5)]
+    assert streams.draws(2, 1, 10, 2)[0]() != up[0]
+
+
+def test_distribution_specs_share_pools_and_respect_their_support():
+    sampler = Sampler(np.random.default_rng(2))
+    draw = sampler.periods({'dist': 'truncated_normal', 'mean': 1, 'sigma': 3})
+    assert sampler.periods({'sigma': 3, 'mean': 1, 'dist': 'truncated_normal'}).__self__ is draw.__self__
+    assert min(draw() for _ in range(5000)) >= 0
+    trace = sampler.periods({'dist': 'empirical', 'values': [2.0, 5.0, 7.5]})
+    assert {trace() for _ in range(200)} == {2.0, 5.0, 7.5}
+    gamma = sampler.periods({'dist': 'gamma', 'shape': 2, 'scale': 5})
+    assert abs(np.mean([gamma() for _ in range(20000)]) - 10) < 0.3
+    with pytest.raises(ValueError):
+        sampler.periods({'dist': 'cauchy'})
@@ -0,0 +1,40 @@
+import math
+import numpy as np
+from reliability_analysis import markov
+from reliability_analysis.splitting import LevelTracker, estimate, solve
+from reliability_analysis.window_tracker import window_cells
+
+
+def test_level_is_most_failed_nodes_in_any_window():
+    rng = np.random.default_rng(2)
+    windows = window_cells(5, 6, 2, 3)
+    tracker = LevelTracker(5, 6, windows)
+    down = np.zeros(30, dtype=bool)
+    for _ in range(400):
+        k = int(rng.integers(30))
+        down[k] = not down[k]
+        tracker.update(*divmod(k, 6), not down[k])
+        assert tracker.level() == max(int(down[cells].sum()) for cells in windows)
+        assert tracker.failed() == (tracker.level() == 6)
+    tracker.reset([0, 1, 2])
+    assert tracker.level() == 3 and not tracker.failed()
+
+
+def test_splitting_matches_exact_mttf():
+    exact = markov.solve(3, 3, 2, 2, 10, 10, 1)['MTTF']
+    solution = solve(3, 3, 2, 2, 10, 10, 1, [np.random.default_rng(k) for k in range(20)], effort=200)
+    assert abs(solution['MTTF'] - exact) < 4 * solution['MTTF_se']
+    assert 0 < solution['failure_probability'] < 0.1
+    assert solution['runs'] == 20 and solution['events'] > 0
+
+
+def test_unreachable_failure_has_zero_probability():
+    result = estimate(3, 3, 2, 2, 0.01, 10, 1, np.random.default_rng(0), effort=20)
+    assert result == {'failure_probability': 0.0, 'MTTF': 0.01, 'events': result['events']}
+    assert math.isinf(solve(3, 3, 2, 2, 1, 10, 1, [np.random.default_rng(0)], effort=10)['MTTF_se'])
+
+
+def test_splitting_results_do_not_depend_on_workers():
+    args = (3, 3, 2, 2, 10, 10, 1)
+    serial = solve(*args, [np.random.default_rng(k) for k in range(4)], effort=50)
+    assert solve(*args, [np.random.default_rng(k) for k in range(4)], effort=50, workers=2) == serial
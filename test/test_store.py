@@ -0,0 +1,62 @@
+import numpy as np
+from reliability_analysis.parallel import run_batches
+from reliability_analysis.store import ResultStore
+
+
+def test_runs_are_appended_in_chunks_and_read_by_column(tmp_path):
+    store = ResultStore(str(tmp_path), flush_runs=4)
+    first = store.add_batch('small', {'m': 3, 'end': 10}, 7)
+    second = store.add_batch('large', {'m': 6, 'end': 10}, 7)
+    store.append(first, 0, [[0.1, 0.2], [10, 4], [10, 3], [1.5, 2], [8, 9]])
+    assert len(store) == 0
+    store.append(second, 0, [[0.3, 0.4, 0.5], [1, 2, 3], [1, 2, 3], [1, 1, 1], [2, 2, 2]])
+    assert len(store) == 5
+    store.append(second, 3, [[0.6], [4], [4], [1], [2]])
+    store.close()
+    reopened = ResultStore(str(tmp_path))
+    columns = reopened.read(['downtime', 'run', 'm', 'name', 'seed'])
+    assert isinstance(columns['downtime'], np.memmap)
+    assert columns['downtime'].tolist() == [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+    assert columns['run'].tolist() == [0, 1, 0, 1, 2, 3]
+    assert columns['m'].tolist() == [3, 3, 6, 6, 6, 6]
+    assert columns['name'][0] == 'small' and columns['seed'][0] == '7'
+    # New batches get new ids after reopening
+    assert reopened.add_batch('more', {}, 7) == 2
+
+
+def test_columns_cut_to_the_runs_every_column_has(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.append(store.add_batch('batch', {}, 1), 0, [[0.1], [1], [1], [1], [1]])
+    store.close()
+    with open(store.column_path('TTF'), 'ab') as f:
+        f.write(np.zeros(3).tobytes())
+    assert len(store) == 1 and store.column('TTF').tolist() == [1.0]
+
+
+def test_batches_write_every_run(tmp_path):
+    config = {'batch': {'extension_modules': [], 'lam': 10, 'mu': 10, 'end': 20, 'runs': 30}}
+    with ResultStore(str(tmp_path)) as store:
+        stats = run_batches(config, 5, store=store)[0]
+    stored = ResultStore(str(tmp_path)).read(['run', 'TTF', 'lam'])
+    assert stored['run'].tolist() == list(range(30))
+    assert abs(np.mean(stored['TTF']) - stats.mean[1]) < 1e-9
+    assert set(stored['lam']) == {10}
+
+
+def test_reopened_store_drops_runs_of_an_interrupted_flush(tmp_path):
+    store = ResultStore(str(tmp_path))
+    batch = store.add_batch('batch', {}, 1)
+    store.append(batch, 0, [[0.1], [1], [1], [1], [1]])
+    store.close()
+    # A flush cut short after the batch ids and the downtime column
+    for column, value in [('batch', np.int32(batch)), ('run', np.int64(1)), ('downtime', 0.2)]:
+        with open(store.column_path(column), 'ab') as f:
+            f.write(np.asarray([value]).tobytes())
+    reopened = ResultStore(str(tmp_path))
+    assert all(reopened.stored(column) == 1 for column in ('batch', 'run', 'downtime', 'TTF'))
+    reopened.append(batch, 1, [[0.3], [2], [2], [2], [2]])
+    reopened.close()
+    columns = ResultStore(str(tmp_path)).read(['run', 'downtime', 'TTF'])
+    assert columns['run'].tolist() == [0, 1]
+    assert columns['downtime'].tolist() == [0.1, 0.3]
+    assert columns['TTF'].tolist() == [1.0, 2.0]
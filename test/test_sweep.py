@@ -0,0 +1,71 @@
+import io
+import math
+import pytest
+from reliability_analysis.adaptive import mean_intervals
+from reliability_analysis.sweep import expand, plan, run, run_sweeps
+
+
+def test_expand_grid_range_and_zip_groups():
+    points = expand({
+        'grid': {'smart': [True, False]},
+        'range': {'B': [1, 3]},
+        'zip': [{'r': [2, 3], 's': [2, 3]}],
+    })
+    assert len(points) == 8
+    assert points[0] == {'smart': True, 'B': 1, 'r': 2, 's': 2}
+    assert points[-1] == {'smart': False, 'B': 2, 'r': 3, 's': 3}
+    assert expand({'zip': {'m': [5, 10], 'n': [5, 10]}}) == [{'m': 5, 'n': 5}, {'m': 10, 'n': 10}]
+    assert expand({}) == [{}]
+    with pytest.raises(ValueError):
+        expand({'zip': {'m': [5, 10], 'n': [5]}})
+    with pytest.raises(ValueError):
+        expand({'product': {'m': [5]}})
+
+
+def test_plan_overrides_batch_parameters():
+    config = {'batch': {'lam': 10, 'mu': 10, 'end': 20, 'runs': 5, 'sweep': {'grid': {'end': [10, 30]}}}}
+    assert plan(config) == [
+        ('batch', {'lam': 10, 'mu': 10, 'end': 10, 'runs': 5}),
+        ('batch', {'lam': 10, 'mu': 10, 'end': 30, 'runs': 5}),
+    ]
+
+
+def test_results_do_not_depend_on_workers():
+    config = {
+        'spans': {'lam': 10, 'mu': 10, 'runs': 30, 'sweep': {'grid': {'end': [10, 40]}}},
+        'named': {
+            'simulator': 'reliability_analysis.reliability_analysis:simulate',
+            'm': 3, 'n': 3, 'r': 2, 's': 2, 'end': 20, 'runs': 10,
+            'sweep': {'zip': {'lam': [5, 10], 'mu': [10, 5]}},
+        },
+    }
+    out = io.StringIO()
+    serial = run_sweeps(config, 7, workers=1, out=out)
+    assert run_sweeps(config, 7, workers=2) == serial
+    assert [(row['batch'], row['end'], row['lam']) for row in serial] == [
+        ('spans', 10, 10), ('spans', 40, 10), ('named', 20, 5), ('named', 20, 10),
+    ]
+    assert [row['runs'] for row in serial] == [30, 30, 10, 10]
+    assert len(out.getvalue().splitlines()) == 5
+
+
+def test_points_finish_largest_first():
+    points = plan({'batch': {'lam': 10, 'mu': 10, 'runs': 5, 'sweep': {'grid': {'end': [5, 50]}}}})
+    assert [p for p, _, _ in run(points, 1)] == [1, 0]
+
+
+def test_common_random_numbers_narrow_paired_differences():
+    config = {'batch': {
+        'm': 4, 'n': 4, 'lam': 5, 'mu': 2, 'end': 30, 'runs': 100, 'crn': True,
+        'sweep': {'grid': {'mu': [2, 2.5]}},
+    }}
+    rows = run_sweeps(config, 3)
+    assert 'diff_downtime' not in rows[0]
+    difference = rows[1]['diff_downtime']
+    assert difference == pytest.approx(rows[0]['reliability'] - rows[1]['reliability'])
+    assert run_sweeps(config, 3, workers=2) == rows
+    # Independent runs of both points give a much wider interval on the difference
+    config['batch']['crn'] = False
+    independent = {p: stats for p, stats, _ in run(plan(config), 3)}
+    half_widths = [mean_intervals(independent[p])['downtime'][1] for p in (0, 1)]
+    assert rows[1]['diff_downtime_hw'] < 0.7 * math.hypot(*half_widths)
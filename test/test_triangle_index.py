@@ -0,0 +1,25 @@
+import itertools
+import numpy as np
+from reliability_analysis.triangle_index import TriangleIndex, triangular_adjacency
+
+
+def test_index_matches_scan_of_all_triples():
+    rng = np.random.default_rng(0)
+    for m, n in [(3, 3), (4, 5), (6, 4)]:
+        adjacency = triangular_adjacency(m, n)
+        index = TriangleIndex(m, n)
+        for _ in range(50):
+            status = rng.random(m * n) < rng.random()
+            for k, up in enumerate(status.tolist()):
+                index.update(*divmod(k, n), up)
+            failed = any(
+                b in adjacency[a] and c in adjacency[a] and c in adjacency[b] and not status[[a, b, c]].any()
+                for a, b, c in itertools.combinations(range(m * n), 3)
+            )
+            assert index.check_system() == (0 if failed else 1)
+
+
+def test_every_node_is_in_six_triangles():
+    index = TriangleIndex(6, 6)
+    assert len(index.triangles) == 2 * 36
+    assert all(len(triangles) == 6 for triangles in index.node_triangles)
@@ -0,0 +1,55 @@
+import math
+import numpy as np
+from reliability_analysis.accumulators import PairedRunStats, RunStats
+from reliability_analysis.parallel import run_batches
+from reliability_analysis.reliability_analysis import simulate
+from reliability_analysis.sampling import InversionGenerator
+from reliability_analysis.variance_reduction import control_variates, estimates, expected_costs
+
+
+def test_expected_costs_match_simulated_means():
+    rng = np.random.default_rng(3)
+    runs = np.array([simulate(2, 3, 2, 2, 5, 1, 3, rng)[3:] for _ in range(6000)])
+    expected = expected_costs(2, 3, 5, 1, 3)
+    error = runs.std(axis=0) / math.sqrt(len(runs))
+    assert np.all(np.abs(runs.mean(axis=0) - expected) < 4 * error)
+
+
+def test_antithetic_uniforms_are_complementary():
+    plain = InversionGenerator(np.random.default_rng(0)).exponential(2.0, 1000)
+    antithetic = InversionGenerator(np.random.default_rng(0), antithetic=True).exponential(2.0, 1000)
+    assert np.allclose(np.exp(-plain / 2) + np.exp(-antithetic / 2), 1)
+    assert np.all(np.isfinite(plain)) and np.all(np.isfinite(antithetic))
+
+
+def test_paired_run_stats_keep_pair_means():
+    stats = PairedRunStats()
+    stats.extend([[1.0, 3.0, 2.0], [0, 0, 0], [0, 0, 0], [0, 0, 0], [0, 0, 0]])
+    assert stats.count == 3
+    assert stats.independent().count == 1
+    assert stats.independent().mean[0] == 2.0
+
+
+def test_control_variates_reduce_variance_of_downtime():
+    batch = {'m': 4, 'n': 4, 'r': 2, 's': 2, 'lam': 5, 'mu': 2, 'end': 30, 'runs': 200, 'control_variates': True}
+    stats = run_batches({'batch': batch}, 11)[0]
+    reduced = estimates(batch, stats)
+    expected = expected_costs(4, 4, 30, 5, 2)
+    assert reduced['repair_costs'] == (expected[0], math.inf)
+    assert reduced['downtime'][1] > 1
+    assert abs(reduced['downtime'][0] - stats.mean[0]) < 0.05
+    # Without correlation to the controls the estimate stays the plain mean
+    independent = RunStats()
+    rng = np.random.default_rng(0)
+    independent.extend([[1.0] * 50, [2.0] * 50, [3.0] * 50, rng.normal(size=50), rng.normal(size=50)])
+    assert control_variates(independent, (0.0, 0.0))['TTF'] == (2.0, 1.0)
+
+
+def test_antithetic_runs_are_paired():
+    batch = {'m': 4, 'n': 4, 'r': 2, 's': 2, 'lam': 5, 'mu': 2, 'end': 30, 'runs': 100, 'antithetic': True}
+    stats = run_batches({'batch': batch}, 11)[0]
+    assert stats.independent().count == 50
+    assert run_batches({'batch': batch}, 11, workers=2)[0].summary() == stats.summary()
+    reduced = estimates(batch, stats)
+    assert reduced['downtime'][0] == stats.mean[0]
+    assert reduced['maintenance_costs'][1] > 1
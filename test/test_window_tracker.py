@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import reliability_analysis.reliability_analysis as ra
+from reliability_analysis.extensions.diffSpan import diffspan
+from reliability_analysis.extensions.diff_distribution import diff_distribution
+from reliability_analysis.window_tracker import WindowTracker
+
+
+class FixedNode:
+    def __init__(self, status):
+        self.status = status
+
+    def getStatus(self):
+        return self.status
+
+
+def test_tracker_matches_check_system():
+    rng = np.random.default_rng(1)
+    for m, n, r, s in [(3, 3, 2, 2), (4, 6, 2, 3), (5, 5, 3, 1), (6, 4, 1, 4), (3, 3, 4, 2)]:
+        tracker = WindowTracker(m, n, r, s)
+        lattice = [[FixedNode(True) for _ in range(n)] for _ in range(m)]
+        for _ in range(300):
+            i = rng.integers(m)
+            j = rng.integers(n)
+            lattice[i][j].status = not lattice[i][j].status
+            tracker.update(i, j, lattice[i][j].status)
+            assert tracker.check_system() == ra.check_system(r, s, lattice)
+
+
+def test_no_failure_across_row_boundary():
+    # Failed nodes at the end of one row and the start of the next are not s consecutive failures
+    lattice = [[FixedNode(not x) for x in row] for row in [[1, 0, 0], [1, 0, 0], [0, 0, 0]]]
+    assert ra.check_system(1, 2, lattice) == 1
+    assert WindowTracker.from_lattice(1, 2, lattice).check_system() == 1
+
+
+def test_non_wrapped_windows():
+    tracker = WindowTracker(4, 4, 2, 2, wrap=False)
+    for i, j in [(0, 3), (1, 3), (0, 0), (1, 0)]:
+        tracker.update(i, j, False)
+    assert not tracker.failed()
+    tracker.update(2, 2, False)
+    tracker.update(2, 3, False)
+    tracker.update(1, 2, False)
+    assert tracker.failed()
+    tracker.update(1, 2, True)
+    assert not tracker.failed()
+
+
+@pytest.mark.parametrize('module', [diffspan, diff_distribution])
+def test_extension_trackers_on_wide_lattices(module):
+    # Nodes i * n + j of a 2 x 4 lattice feed the tracker at their own (i, j); TTF follows simulate()
+    runs = 300
+    np.random.seed(1)
+    core = [ra.simulate(2, 4, 2, 1, 20, 10, 10, np.random.default_rng(k))[1] for k in range(runs)]
+    extension = [module.simulate(2, 4, 2, 1, 20, 10, 10)[1] for _ in range(runs)]
+    error = np.sqrt((np.var(core) + np.var(extension)) / runs)
+    assert abs(np.mean(extension) - np.mean(core)) < 4 * error